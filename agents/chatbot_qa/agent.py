@@ -1,27 +1,16 @@
-from langchain_elasticsearch import ElasticsearchStore
-from core.settings import settings
-from langchain_openai import OpenAIEmbeddings, ChatOpenAI
-from langgraph.graph import MessagesState, StateGraph
+from langgraph.graph import StateGraph
 from langgraph.graph import END
 from langgraph.prebuilt import tools_condition
-from langgraph.checkpoint.memory import MemorySaver
+from core.checkpoint import build_checkpointer
 
+from agents.chatbot_qa.models import GraphState
 from agents.chatbot_qa.nodes import (
     query_or_respond,
     generate,
     tools,
 )
 
-embeddings = OpenAIEmbeddings(model=settings.EMBEDDINGS_MODEL)
-vector_store = ElasticsearchStore(
-            es_url=settings.ELASTIC_SEARCH_URL,
-            index_name="pitch-deck-ai",
-            embedding=embeddings,
-            es_api_key=settings.ELASTIC_SEARCH_API,
-        )
-llm = ChatOpenAI(model=settings.TEXT_MODEL, temperature=0)
-
-graph_builder = StateGraph(MessagesState)
+graph_builder = StateGraph(GraphState)
 graph_builder.add_node(query_or_respond)
 graph_builder.add_node(tools)
 graph_builder.add_node(generate)
@@ -35,4 +24,4 @@ graph_builder.add_conditional_edges(
 graph_builder.add_edge("tools", "generate")
 graph_builder.add_edge("generate", END)
 
-qa_agent = graph_builder.compile(checkpointer=MemorySaver())
+qa_agent = graph_builder.compile(checkpointer=build_checkpointer())
@@ -0,0 +1,6 @@
+from typing import Optional
+from langgraph.graph import MessagesState
+
+class GraphState(MessagesState):
+    # Deck the conversation is about; retrieval is limited to its chunks
+    deck_id: Optional[str]
@@ -1,37 +1,134 @@
-from langchain_elasticsearch import ElasticsearchStore
+import asyncio
+from typing import Annotated, Any, Dict, List, Optional
+
+from core.clients import get_chat_model, get_elasticsearch, get_vector_store
 from core.settings import settings
-from langchain_openai import OpenAIEmbeddings, ChatOpenAI
-from langgraph.graph import MessagesState
+from core.ratelimit import ainvoke_with_limits
+from langchain_core.documents import Document
+from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool
 from langchain_core.messages import SystemMessage
-from langgraph.prebuilt import ToolNode
-from langgraph.prebuilt import ToolNode
-
-embeddings = OpenAIEmbeddings(model=settings.EMBEDDINGS_MODEL)
-vector_store = ElasticsearchStore(
-            es_url=settings.ELASTIC_SEARCH_URL,
-            index_name="pitch-deck-ai",
-            embedding=embeddings,
-            es_api_key=settings.ELASTIC_SEARCH_API,
+from langgraph.prebuilt import InjectedState, ToolNode
+
+from agents.chatbot_qa.models import GraphState
+
+def _deck_filter(deck_id: Optional[str]) -> Any:
+    if settings.VECTOR_BACKEND == "local":
+        return {"deck_id": deck_id} if deck_id else None
+    return [{"term": {"metadata.deck_id.keyword": deck_id}}] if deck_id else []
+
+async def keyword_search(query: str, deck_id: Optional[str], k: int) -> List[Document]:
+    """BM25 match on the chunk text, scoped like the vector search."""
+    search_filter = _deck_filter(deck_id)
+    if settings.VECTOR_BACKEND == "local":
+        return await get_vector_store(settings.VECTOR_INDEX_NAME).akeyword_search(
+            query, k=k, filter=search_filter
         )
-llm = ChatOpenAI(model=settings.TEXT_MODEL, temperature=0)
+    response = await get_elasticsearch().search(
+        index=settings.VECTOR_INDEX_NAME,
+        query={"bool": {"must": [{"match": {"text": query}}], "filter": search_filter}},
+        size=k,
+        source=["text", "metadata"],
+    )
+    return [
+        Document(hit["_source"].get("text", ""), metadata=hit["_source"].get("metadata", {}))
+        for hit in response["hits"]["hits"]
+    ]
+
+def reciprocal_rank_fusion(rankings: List[List[Document]], k: int, rrf_k: int = 60) -> List[Document]:
+    """Merge ranked lists by summing 1 / (rrf_k + rank) for each chunk."""
+    scores: Dict[tuple, float] = {}
+    documents: Dict[tuple, Document] = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, start=1):
+            key = (doc.metadata.get("deck_id"), doc.page_content)
+            documents.setdefault(key, doc)
+            scores[key] = scores.get(key, 0.0) + 1 / (rrf_k + rank)
+    return [documents[key] for key in sorted(scores, key=scores.get, reverse=True)[:k]]
+
+async def search_deck(
+    query: str,
+    deck_id: Optional[str],
+    k: int,
+    search_type: str = "similarity",
+) -> List[Document]:
+    """
+    kNN search over one deck's chunks (the whole index if no deck is given).
+
+    `search_type` is "similarity", "hybrid" (BM25 and kNN rankings of
+    QA_RETRIEVAL_FETCH_K candidates each, merged by reciprocal rank fusion),
+    "mmr" (diverse results re-ranked from QA_RETRIEVAL_FETCH_K candidates) or
+    "threshold" (only chunks scoring at least QA_RETRIEVAL_SCORE_THRESHOLD).
+    """
+    vector_store = get_vector_store(settings.VECTOR_INDEX_NAME)
+    search_filter = _deck_filter(deck_id)
+
+    if search_type == "hybrid":
+        fetch_k = max(k, settings.QA_RETRIEVAL_FETCH_K)
+        lexical, semantic = await asyncio.gather(
+            keyword_search(query, deck_id, fetch_k),
+            vector_store.asimilarity_search(query, k=fetch_k, filter=search_filter),
+        )
+        return reciprocal_rank_fusion([lexical, semantic], k, settings.QA_RETRIEVAL_RRF_K)
+
+    if search_type == "mmr" and settings.VECTOR_BACKEND == "local":
+        return await vector_store.amax_marginal_relevance_search(
+            query,
+            k=k,
+            fetch_k=max(k, settings.QA_RETRIEVAL_FETCH_K),
+            lambda_mult=settings.QA_RETRIEVAL_MMR_LAMBDA,
+            filter=search_filter,
+        )
+    if search_type == "mmr":
+        def with_filter(query_body: Dict[str, Any], query: str) -> Dict[str, Any]:
+            # The MMR search does not take a filter argument; add it to the kNN clause
+            if search_filter and "knn" in query_body:
+                query_body["knn"]["filter"] = search_filter
+            return query_body
+
+        return await vector_store.amax_marginal_relevance_search(
+            query,
+            k=k,
+            fetch_k=max(k, settings.QA_RETRIEVAL_FETCH_K),
+            lambda_mult=settings.QA_RETRIEVAL_MMR_LAMBDA,
+            custom_query=with_filter,
+        )
+    if search_type == "threshold":
+        scored = await vector_store.asimilarity_search_with_score(query, k=k, filter=search_filter)
+        return [doc for doc, score in scored if score >= settings.QA_RETRIEVAL_SCORE_THRESHOLD]
+    return await vector_store.asimilarity_search(query, k=k, filter=search_filter)
+
+def format_chunk(doc: Document) -> str:
+    """A retrieved chunk labelled with where it came from, for the model to cite."""
+    if doc.metadata.get("kind") == "slide":
+        return f"[Slide {doc.metadata['slide']}]\n{doc.page_content}"
+    if doc.metadata.get("kind") == "section":
+        return f"[Summary]\n{doc.page_content}"
+    return doc.page_content
 
 @tool(response_format="content_and_artifact")
-def retrieve(query: str):
+async def retrieve(
+    query: str,
+    state: Annotated[dict, InjectedState],
+    config: RunnableConfig,
+):
     """Retrieve information related to a query."""
-    retrieved_docs = vector_store.similarity_search(query, k=10)
-    serialized = "\n\n".join(
-        (f"Source: {doc.metadata}\n" f"Content: {doc.page_content}")
-        for doc in retrieved_docs
+    configurable = config.get("configurable", {})
+    retrieved_docs = await search_deck(
+        query,
+        state.get("deck_id"),
+        k=int(configurable.get("retrieval_k", settings.QA_RETRIEVAL_K)),
+        search_type=configurable.get("retrieval_search", settings.QA_RETRIEVAL_SEARCH),
     )
+    serialized = "\n\n".join(format_chunk(doc) for doc in retrieved_docs)
     return serialized, retrieved_docs
 
 # Step 1: Generate an AIMessage that may include a tool-call to be sent.
-def query_or_respond(state: MessagesState):
+async def query_or_respond(state: GraphState):
     """Generate tool call for retrieval or respond."""
     print("--- Step 1: Query or Respond ---")
-    llm_with_tools = llm.bind_tools([retrieve])
-    response = llm_with_tools.invoke(state["messages"])
+    llm_with_tools = get_chat_model().bind_tools([retrieve])
+    response = await ainvoke_with_limits("openai", llm_with_tools, state["messages"])
     # MessagesState appends messages to state instead of overwriting
     return {"messages": [response]}
 
@@ -41,7 +138,7 @@ tools = ToolNode([retrieve])
 
 
 # Step 3: Generate a response using the retrieved content.
-def generate(state: MessagesState):
+async def generate(state: GraphState):
     """Generate answer."""
     # Get generated ToolMessages
     recent_tool_messages = []
@@ -56,12 +153,10 @@ def generate(state: MessagesState):
     docs_content = "\n\n".join(doc.content for doc in tool_messages)
     system_message_content = (
         "You are an assistant for question-answering tasks. "
-        "Use the following pieces of retrieved context to answer "
+        "Use the retrieved context given after the conversation to answer "
         "the question. If you don't know the answer, say that you "
         "don't know. Use three sentences maximum and keep the "
-        "answer concise."
-        "\n\n"
-        f"{docs_content}"
+        "answer concise. Cite the slides you used as (Slide N)."
     )
     conversation_messages = [
         message
@@ -69,6 +164,12 @@ def generate(state: MessagesState):
         if message.type in ("human", "system")
         or (message.type == "ai" and not message.tool_calls)
     ]
-    prompt = [SystemMessage(system_message_content)] + conversation_messages
-    response = llm.invoke(prompt)
+    # Constant instructions and the append-only conversation first, so the prefix
+    # stays identical between turns for provider prompt caching
+    prompt = (
+        [SystemMessage(system_message_content)]
+        + conversation_messages
+        + [SystemMessage(f"Retrieved context:\n\n{docs_content}")]
+    )
+    response = await ainvoke_with_limits("openai", get_chat_model(), prompt)
     return {"messages": [response]}
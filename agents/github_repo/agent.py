@@ -1,6 +1,6 @@
 from langgraph.graph import StateGraph
 from langchain_core.runnables import RunnableLambda
-from langgraph.checkpoint.memory import MemorySaver
+from core.checkpoint import build_checkpointer
 from agents.github_repo.models import (
     GraphState,
 )
@@ -18,4 +18,4 @@ graph.set_entry_point("github_repo")
 graph.set_finish_point("end")
 graph.add_edge("github_repo", "end")
 
-github_repo_agent = graph.compile(checkpointer=MemorySaver())
+github_repo_agent = graph.compile(checkpointer=build_checkpointer(one_shot=True))
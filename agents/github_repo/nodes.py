@@ -1,6 +1,5 @@
-from firecrawl import FirecrawlApp
-from langchain_openai import ChatOpenAI
-from core.settings import settings
+from core.clients import get_firecrawl
+from core.llm import ainvoke_structured, prompt_messages
 from core.prompts import GITHUB_ORG_DETAILS_EXTRACT_PROMPT
 
 from agents.github_repo.models import (
@@ -8,15 +7,12 @@ from agents.github_repo.models import (
     Repositories
 )
 
-language_model = ChatOpenAI(model=settings.TEXT_MODEL, temperature=0).with_structured_output(Repositories)
-
-def github_repo(state: GraphState) -> GraphState:
+async def github_repo(state: GraphState) -> GraphState:
     try:
         print("--- Step 1: Get Github Repos ---")
-        app = FirecrawlApp(api_key=settings.FIRECRAWL_API_KEY)
-        scrape_result = app.scrape_url(state['link'], formats=['markdown'])
-        response = language_model.invoke(
-            GITHUB_ORG_DETAILS_EXTRACT_PROMPT + str(scrape_result.markdown)
+        scrape_result = await get_firecrawl().scrape_url(state['link'], formats=['markdown'])
+        response = await ainvoke_structured(
+            "openai", Repositories, prompt_messages(GITHUB_ORG_DETAILS_EXTRACT_PROMPT, str(scrape_result.markdown))
         )
         state["repo"] = response
         return state
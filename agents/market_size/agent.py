@@ -7,12 +7,12 @@ from agents.market_size.models import (
 from agents.market_size.nodes import (
     market_research,
     end_state,
-    tools
+    get_tools
 )
 
 graph = StateGraph(GraphState)
 graph.add_node("market_research", RunnableLambda(market_research))
-graph.add_node("tools", ToolNode(tools))
+graph.add_node("tools", ToolNode(get_tools()))
 graph.add_node("end", RunnableLambda(end_state))
 
 graph.set_entry_point("market_research")
@@ -1,22 +1,30 @@
-from langchain_community.tools.tavily_search import TavilySearchResults
-from langchain_openai import ChatOpenAI
+from functools import lru_cache
+
+from langchain_core.runnables import Runnable
+
 from core.prompts import MARKET_RESEARCH_PROMPT
-from core.settings import settings
+from core.clients import get_chat_model, get_search_tool
+from core.llm import ainvoke_structured, prompt_messages
 from agents.market_size.models import (
     GraphState,
     MarketResearchResponse    
 )
 
-language_model = ChatOpenAI(model=settings.TEXT_MODEL, temperature=0)
-search_tool = TavilySearchResults(k=3)
-tools = [search_tool]
-language_model = language_model.bind_tools(tools).with_structured_output(MarketResearchResponse)  
+def get_tools() -> list:
+    return [get_search_tool()]
+
+@lru_cache(maxsize=None)
+def get_language_model() -> Runnable:
+    return get_chat_model().bind_tools(get_tools()).with_structured_output(MarketResearchResponse)
 
-def market_research(state: GraphState) -> GraphState:
+async def market_research(state: GraphState) -> GraphState:
     try:
         print("--- Step 1: Market Research ---")
-        response = language_model.invoke(
-            MARKET_RESEARCH_PROMPT + str(state["input_overview"])
+        response = await ainvoke_structured(
+            "openai",
+            MarketResearchResponse,
+            prompt_messages(MARKET_RESEARCH_PROMPT, str(state["input_overview"])),
+            runnable=get_language_model(),
         )
         
         state["sector"] = response.sector
@@ -1,6 +1,6 @@
 from langgraph.graph import StateGraph
 from langchain_core.runnables import RunnableLambda
-from langgraph.checkpoint.memory import MemorySaver
+from core.checkpoint import build_checkpointer
 
 
 from agents.pitch_deck.models import (
@@ -8,9 +8,8 @@ from agents.pitch_deck.models import (
 )
 
 from agents.pitch_deck.nodes import (
-    OCRSlide,
-    SummarizeSlide,
-    ScoreSlide,
+    AnalyzeDeck,
+    IndexSummary,
     should_continue,
     end_state
 )
@@ -18,35 +17,25 @@ from agents.pitch_deck.nodes import (
 graph = StateGraph(GraphState)
 
 # Nodes
-graph.add_node("OCRSlide", RunnableLambda(OCRSlide))
-graph.add_node("SummarizeSlide", RunnableLambda(SummarizeSlide))
-graph.add_node("ScoreSlide", RunnableLambda(ScoreSlide))
+graph.add_node("AnalyzeDeck", RunnableLambda(AnalyzeDeck))
+graph.add_node("IndexSummary", RunnableLambda(IndexSummary))
 graph.add_node("end", RunnableLambda(end_state))
 
 # Flow with conditional routing
-graph.set_entry_point("OCRSlide")
+graph.set_entry_point("AnalyzeDeck")
 
 # Add conditional edges
 graph.add_conditional_edges(
-    "OCRSlide",
+    "AnalyzeDeck",
     should_continue,
     {
-        "continue": "SummarizeSlide",
+        "continue": "IndexSummary",
         "end": "end"
     }
 )
 
 graph.add_conditional_edges(
-    "SummarizeSlide",
-    should_continue,
-    {
-        "continue": "ScoreSlide",
-        "end": "end"
-    }
-)
-
-graph.add_conditional_edges(
-    "ScoreSlide",
+    "IndexSummary",
     should_continue,
     {
         "continue": "end",
@@ -56,4 +45,4 @@ graph.add_conditional_edges(
 
 graph.set_finish_point("end")
 
-pitch_deck_agent = graph.compile(checkpointer=MemorySaver())
+pitch_deck_agent = graph.compile(checkpointer=build_checkpointer(one_shot=True))
@@ -0,0 +1,105 @@
+import json
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Sequence
+
+import tiktoken
+
+from core.settings import settings
+
+# Summary section -> words that mark a slide as relevant to it
+SECTION_KEYWORDS: Dict[str, Sequence[str]] = {
+    "Company Overview": (
+        "mission", "vision", "problem", "solution", "product", "platform", "we are",
+        "we help", "founded", "headquarter", "team", "employees", "industry", "region",
+        "raise", "raising", "ask", "funding", "round", "seed", "series", "pre-seed",
+        "valuation", "investors", "use of funds",
+    ),
+    "Founder-Market Fit": (
+        "team", "founder", "co-founder", "ceo", "cto", "coo", "cfo", "advisor",
+        "board", "experience", "previously", "former", "ex-", "phd", "mba",
+        "university", "years", "background", "led", "built",
+    ),
+    "Market Sizing & Growth": (
+        "market", "tam", "sam", "som", "addressable", "serviceable", "cagr",
+        "growth", "billion", "bn", "industry", "segment", "opportunity", "trend",
+    ),
+    "Traction": (
+        "traction", "customers", "users", "revenue", "arr", "mrr", "growth", "mom",
+        "yoy", "pilot", "poc", "partners", "partnership", "contracts", "signed",
+        "retention", "churn", "cac", "ltv", "press", "testimonial", "waitlist",
+        "downloads", "gmv", "pipeline", "loi",
+    ),
+}
+
+# Slides always routed to a section, e.g. the title slide names the company
+SECTION_LEADING_SLIDES: Dict[str, int] = {"Company Overview": 2}
+
+
+@lru_cache(maxsize=None)
+def _encoding() -> tiktoken.Encoding:
+    try:
+        return tiktoken.encoding_for_model(settings.TEXT_MODEL)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def count_tokens(text: str) -> int:
+    return len(_encoding().encode(text))
+
+
+def _compact_slide(slide: Dict[str, Any]) -> str:
+    """One slide as single-line JSON, leaving out empty fields."""
+    record = {"slide": slide["index"] + 1}
+    for field in ("text", "image", "figure"):
+        if slide.get(field):
+            record[field] = slide[field]
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+
+
+def _relevance(summary_type: str, slide: Dict[str, Any]) -> int:
+    text = " ".join(
+        str(item) for field in ("text", "image", "figure") for item in slide.get(field) or []
+    ).lower()
+    return sum(
+        1 for keyword in SECTION_KEYWORDS.get(summary_type, ())
+        # Whole words (or plurals); a leading digit is allowed for units such as "$2bn"
+        if re.search(rf"(?<![a-z]){re.escape(keyword)}(?:s)?\b", text)
+    )
+
+
+def build_summary_context(summary_type: str, slide_content: List[Dict[str, Any]]) -> str:
+    """
+    Serialize the slides a summary reads, compactly and within a token budget.
+
+    Duplicate slides are left out. With SUMMARY_CONTEXT_ROUTING only slides
+    matching the section's keywords (plus its leading slides) are sent, falling
+    back to the whole deck when none match. If the slides exceed
+    SUMMARY_CONTEXT_MAX_TOKENS the least relevant ones are dropped; the rest
+    keep their deck order.
+    """
+    slides = [slide for slide in slide_content if slide and slide.get("duplicate_of") is None]
+    scores = {slide["index"]: _relevance(summary_type, slide) for slide in slides}
+    if settings.SUMMARY_CONTEXT_ROUTING:
+        leading = SECTION_LEADING_SLIDES.get(summary_type, 0)
+        routed = [
+            slide for position, slide in enumerate(slides)
+            if scores[slide["index"]] or position < leading
+        ]
+        if any(scores[slide["index"]] for slide in routed):
+            slides = routed
+
+    lines = {slide["index"]: _compact_slide(slide) for slide in slides}
+    budget = settings.SUMMARY_CONTEXT_MAX_TOKENS
+    if budget:
+        kept = set()
+        used = 0
+        for index in sorted(lines, key=lambda index: (-scores[index], index)):
+            tokens = count_tokens(lines[index]) + 1
+            if used + tokens > budget:
+                continue
+            kept.add(index)
+            used += tokens
+        lines = {index: line for index, line in lines.items() if index in kept}
+
+    return "\nslide_content = [\n" + ",\n".join(lines[index] for index in sorted(lines)) + "\n]"
@@ -1,77 +1,261 @@
+import asyncio
 from langchain_core.runnables import RunnableLambda
-from typing import Dict, Any, Tuple
-from langchain_openai import ChatOpenAI
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.messages import HumanMessage
-from langchain_community.tools.tavily_search import TavilySearchResults
-from core.prompts import SLIDE_TO_TEXT_PROMPT, SUMMARIZE_COMPANY_OVERVIEW_PROMPT, SUMMARIZE_FOUNDER_MARKET_FIT_PROMPT, SUMMARIZE_MARKET_SIZING_PROMPT, SUMMARIZE_TRACTION_PROMPT, SCORING_PROMPT
+from typing import Dict, Any, List, Optional, Tuple
+from pydantic import BaseModel
+from core.prompts import SLIDE_TO_TEXT_PROMPT, SLIDES_BATCH_TO_TEXT_PROMPT, SLIDES_BATCH_COUNT_PROMPT, SUMMARIZE_COMPANY_OVERVIEW_PROMPT, SUMMARIZE_FOUNDER_MARKET_FIT_PROMPT, SUMMARIZE_MARKET_SIZING_PROMPT, SUMMARIZE_TRACTION_PROMPT
 from google.api_core.exceptions import ResourceExhausted
+from agents.pitch_deck.context import build_summary_context
 from agents.pitch_deck.models import (
     CompanyOverview,
     FounderMarketFit,
     MarketSizingGrowth,
     Traction,
     ProcessSlideResponse,
+    BatchProcessSlideResponse,
 )
 from core.settings import settings
+from core.blobs import blob_store
+from core.cache import SQLiteCache, hash_text
+from core.clients import get_structured_vision_model
+from core.ratelimit import ainvoke_with_limits, retryable_errors
+from core.llm import ainvoke_structured, prompt_messages
 
-def vision_model_fn(input_dict):
+async def vision_model_fn(input_dict):
     image_bytes = input_dict["image"]
     prompt = input_dict["prompt"]
     try:
-        response = ChatGoogleGenerativeAI(model=settings.VISION_MODEL, google_api_key=settings.GOOGLE_API_KEY).with_structured_output(ProcessSlideResponse).invoke([
-            HumanMessage(content=[
-                {"type": "text", "text": prompt},
-                {"type": "image_url", "image_url": {"url": image_bytes}}
-            ])
-        ])
+        response = await ainvoke_with_limits("gemini", get_structured_vision_model(ProcessSlideResponse), prompt_messages(
+            prompt,
+            [{"type": "image_url", "image_url": {"url": image_bytes}}]
+        ))
         return response
     
     except ResourceExhausted as e:
-        print(f"Resource exhausted error: {str(e)}")
-        raise  # Let the retry decorator handle it
+        print(f"Resource exhausted error after retries: {str(e)}")
+        raise
         
     except Exception as e:
         print(f"Unexpected error occurred: {str(e)}")
-        raise  # Let the retry decorator handle it
+        raise
 
 vision_model = RunnableLambda(vision_model_fn)
 
-language_model = ChatOpenAI(model=settings.TEXT_MODEL, temperature=0)
-search_tool = TavilySearchResults(k=3)
+async def batch_vision_model_fn(input_dict):
+    images = input_dict["images"]
+    prompt = input_dict["prompt"]
+    response = await ainvoke_with_limits("gemini", get_structured_vision_model(BatchProcessSlideResponse), prompt_messages(
+        prompt,
+        [
+            {"type": "text", "text": SLIDES_BATCH_COUNT_PROMPT.format(count=len(images))},
+            *({"type": "image_url", "image_url": {"url": image}} for image in images)
+        ]
+    ))
+    if response is None or len(response.slides) != len(images):
+        raise ValueError(
+            f"Expected {len(images)} slides in batch response, got "
+            f"{'none' if response is None else len(response.slides)}"
+        )
+    return response.slides
+
+batch_vision_model = RunnableLambda(batch_vision_model_fn)
+
 summary_tasks = [
-        ("Company Overview", language_model, SUMMARIZE_COMPANY_OVERVIEW_PROMPT),
-        ("Founder-Market Fit", language_model, SUMMARIZE_FOUNDER_MARKET_FIT_PROMPT),
-        ("Market Sizing & Growth", language_model, SUMMARIZE_MARKET_SIZING_PROMPT),
-        ("Traction", language_model, SUMMARIZE_TRACTION_PROMPT)
+        ("Company Overview", CompanyOverview, SUMMARIZE_COMPANY_OVERVIEW_PROMPT),
+        ("Founder-Market Fit", FounderMarketFit, SUMMARIZE_FOUNDER_MARKET_FIT_PROMPT),
+        ("Market Sizing & Growth", MarketSizingGrowth, SUMMARIZE_MARKET_SIZING_PROMPT),
+        ("Traction", Traction, SUMMARIZE_TRACTION_PROMPT)
     ]
 
-def process_single_slide(slide_data: Dict[str, Any]) -> Dict[str, Any]:
-    """Process a single slide in parallel"""
-    image = slide_data["imageByte"]
+slide_cache = SQLiteCache(
+    settings.CACHE_DB_PATH,
+    "slide_ocr",
+    ttl_seconds=settings.SLIDE_CACHE_TTL_SECONDS,
+    max_entries=settings.SLIDE_CACHE_MAX_ENTRIES,
+)
+
+def slide_cache_key(slide_data: Dict[str, Any]) -> str:
+    """Key a slide's OCR by its rendered image, the OCR prompt and the vision model"""
+    return hash_text(slide_data["imageRef"], SLIDE_TO_TEXT_PROMPT, str(settings.VISION_MODEL))
+
+def extract_text_layer(slide_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Use the PDF's own text layer instead of the vision model when the slide is
+    text-based: enough extractable text, little image area and few vector
+    drawings (charts, diagrams). Returns None when the slide needs the vision model.
+    """
+    stats = slide_data.get("pageStats")
+    if not settings.TEXT_LAYER_ENABLED or not stats:
+        return None
+    if (
+        stats["text_chars"] < settings.TEXT_LAYER_MIN_CHARS
+        or stats["image_area_ratio"] > settings.TEXT_LAYER_MAX_IMAGE_RATIO
+        or stats["drawing_count"] > settings.TEXT_LAYER_MAX_DRAWINGS
+    ):
+        return None
+    return {
+        "text": slide_data["textLayer"],
+        "image": [],
+        "figure": [],
+        "source": "text_layer"
+    }
+
+def _hash_distance(a: str, b: str) -> int:
+    return bin(int(a, 16) ^ int(b, 16)).count("1")
+
+def _near(a: Dict[str, Any], b: Dict[str, Any]) -> bool:
+    if not a.get("textLayer") or not b.get("textLayer"):
+        return False
+    if not a.get("fingerprint") or not b.get("fingerprint"):
+        return False
+    return _hash_distance(a["fingerprint"], b["fingerprint"]) <= settings.DEDUP_MAX_HASH_DISTANCE
+
+def _is_build_step(current: Dict[str, Any], following: Dict[str, Any]) -> bool:
+    return _near(current, following) and set(current["textLayer"]) <= set(following["textLayer"])
+
+class SlideDeduplicator:
+    """
+    Map every slide to the slide whose OCR it can reuse (itself if none), for
+    slides that arrive one at a time in deck order.
+
+    - Identical renders, anywhere in the deck, share one OCR.
+    - Near-identical pages (close fingerprints, same text layer), such as
+      repeated appendix pages, reuse the first occurrence.
+    - Consecutive build steps, where each page only adds to the previous one's
+      text and looks nearly the same, reuse the last and most complete step.
+
+    The last two rules need text on both pages: the 9x8 fingerprint alone
+    cannot tell apart image-only slides with similar layouts, so those are
+    only merged when their renders are identical.
+
+    `add` and `finish` return the (index, representative) pairs settled by
+    that call. A page is settled once the next page shows whether it was a
+    build step, so a chain of steps settles together, its final page first.
+    """
+
+    def __init__(self):
+        self.slides: List[Dict[str, Any]] = []
+        self._chain: List[int] = []
+        self._seen_images: Dict[str, int] = {}
+        self._seen_pages: List[int] = []
+
+    def add(self, slide: Dict[str, Any]) -> List[Tuple[int, int]]:
+        index = len(self.slides)
+        self.slides.append(slide)
+        if not settings.DEDUP_SLIDES_ENABLED:
+            return [(index, index)]
+        if self._chain and _is_build_step(self.slides[self._chain[-1]], slide):
+            self._chain.append(index)
+            return []
+        settled = self._settle()
+        self._chain = [index]
+        return settled
+
+    def finish(self) -> List[Tuple[int, int]]:
+        settled = self._settle()
+        self._chain = []
+        return settled
+
+    def _settle(self) -> List[Tuple[int, int]]:
+        if not self._chain:
+            return []
+        final = self._chain[-1]
+        slide = self.slides[final]
+        representative = self._seen_images.get(slide["imageRef"])
+        if representative is None:
+            representative = next(
+                (
+                    j for j in self._seen_pages
+                    if slide.get("textLayer") == self.slides[j].get("textLayer") and _near(slide, self.slides[j])
+                ),
+                None,
+            )
+        if representative is None:
+            representative = final
+            self._seen_images[slide["imageRef"]] = final
+            self._seen_pages.append(final)
+        return [(index, representative) for index in (final, *self._chain[:-1])]
+
+def find_duplicate_slides(slides: List[Dict[str, Any]]) -> List[int]:
+    """`SlideDeduplicator` applied to a whole deck at once."""
+    deduplicator = SlideDeduplicator()
+    representative = list(range(len(slides)))
+    for slide in slides:
+        for index, target in deduplicator.add(slide):
+            representative[index] = target
+    for index, target in deduplicator.finish():
+        representative[index] = target
+    return representative
+
+async def process_single_slide(slide_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Process a single slide concurrently, reusing the OCR of identical slides"""
+    cache_key = slide_cache_key(slide_data)
+    if settings.SLIDE_CACHE_ENABLED and (cached := await slide_cache.aget(cache_key)) is not None:
+        return {**cached, "source": "cache"}
     
-    response = vision_model.invoke({
-        "image": image,
+    response = await vision_model.ainvoke({
+        "image": await blob_store.data_url(slide_data["imageRef"], slide_data["mimeType"]),
         "prompt": SLIDE_TO_TEXT_PROMPT
     })
     
-    return {
+    result = {
         "text": response.text,
         "image": response.image,
         "figure": response.figure
     }
+    if settings.SLIDE_CACHE_ENABLED:
+        await slide_cache.aset(cache_key, result)
+    return {**result, "source": "vision"}
+
+async def process_slide_batch(slides: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    OCR several slides with one multimodal request. Cached slides are skipped, and
+    if the batched response cannot be parsed the slides are processed one by one.
+    """
+    results: List[Any] = [None] * len(slides)
+    if settings.SLIDE_CACHE_ENABLED:
+        for i, slide in enumerate(slides):
+            if (cached := await slide_cache.aget(slide_cache_key(slide))) is not None:
+                results[i] = {**cached, "source": "cache"}
+    pending = [i for i, result in enumerate(results) if result is None]
+    if len(pending) < 2:
+        for i in pending:
+            results[i] = await process_single_slide(slides[i])
+        return results
+
+    try:
+        responses = await batch_vision_model.ainvoke({
+            "images": [
+                await blob_store.data_url(slides[i]["imageRef"], slides[i]["mimeType"])
+                for i in pending
+            ],
+            "prompt": SLIDES_BATCH_TO_TEXT_PROMPT
+        })
+    except retryable_errors():
+        raise
+    except Exception as e:
+        print(f"Batched OCR failed, falling back to single slides: {str(e)}")
+        singles = await asyncio.gather(*(process_single_slide(slides[i]) for i in pending))
+        for i, result in zip(pending, singles):
+            results[i] = result
+        return results
+
+    for i, response in zip(pending, responses):
+        results[i] = {
+            "text": response.text,
+            "image": response.image,
+            "figure": response.figure
+        }
+        if settings.SLIDE_CACHE_ENABLED:
+            await slide_cache.aset(slide_cache_key(slides[i]), results[i])
+        results[i]["source"] = "vision"
+    return results
 
-def process_summary(summary_type: str, model, prompt: str, slide_content: list) -> Tuple[str, Any]:
-    """Process a single summary in parallel"""
+async def process_summary(summary_type: str, schema: type[BaseModel], prompt: str, slide_content: list) -> Tuple[str, Any]:
+    """Process a single summary concurrently"""
     try:
-        result = model.with_structured_output(
-            {
-                "Company Overview": CompanyOverview,
-                "Founder-Market Fit": FounderMarketFit,
-                "Market Sizing & Growth": MarketSizingGrowth,
-                "Traction": Traction
-            }[summary_type]
-        ).invoke(prompt + str(slide_content))
+        result = await ainvoke_structured(
+            "openai", schema, prompt_messages(prompt, build_summary_context(summary_type, slide_content))
+        )
         return summary_type, result
     except Exception as e:
         print(f"Error processing {summary_type} summary: {str(e)}")
@@ -0,0 +1,95 @@
+import asyncio
+import json
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from langchain_core.documents import Document
+from pydantic import BaseModel
+
+from core.clients import get_vector_store
+from core.settings import settings
+from agents.pitch_deck.models import SlideContent
+
+# Indexing runs started off the response path, kept so they are not garbage collected
+_pending: Set[asyncio.Task] = set()
+
+
+def _section_text(section: str, value: Any) -> str:
+    if isinstance(value, BaseModel):
+        value = value.model_dump(mode="json", by_alias=True, exclude_none=True)
+    return f"{section}: {json.dumps(value, ensure_ascii=False, default=str)}"
+
+
+def _slide_text(slide: SlideContent) -> str:
+    lines = list(slide.get("text") or [])
+    lines += [f"Image: {image}" for image in slide.get("image") or []]
+    lines += [f"Figure: {figure}" for figure in slide.get("figure") or []]
+    return "\n".join(lines)
+
+
+def deck_documents(
+    deck_id: str,
+    slide_content: List[Optional[SlideContent]],
+    summary: Dict[str, Any],
+) -> Tuple[List[Document], List[str]]:
+    """
+    Per-slide and per-summary-section chunks of a deck, with ids derived from
+    the deck id so re-indexing the same deck overwrites instead of duplicating.
+    Duplicate and empty slides are skipped.
+    """
+    documents, ids = [], []
+    for slide in slide_content:
+        if not slide or slide.get("duplicate_of") is not None:
+            continue
+        text = _slide_text(slide)
+        if not text:
+            continue
+        number = slide["index"] + 1
+        documents.append(Document(text, metadata={"deck_id": deck_id, "kind": "slide", "slide": number}))
+        ids.append(f"{deck_id}:slide:{number}")
+    for section, value in summary.items():
+        if value is None:
+            continue
+        documents.append(
+            Document(_section_text(section, value), metadata={"deck_id": deck_id, "kind": "section", "section": section})
+        )
+        ids.append(f"{deck_id}:section:{section}")
+    return documents, ids
+
+
+async def index_deck(
+    deck_id: str,
+    slide_content: List[Optional[SlideContent]],
+    summary: Dict[str, Any],
+) -> None:
+    """Bulk-upsert a deck's chunks without waiting for an index refresh."""
+    documents, ids = deck_documents(deck_id, slide_content, summary)
+    if not documents:
+        return
+    await get_vector_store(settings.VECTOR_INDEX_NAME).aadd_documents(
+        documents, ids=ids, refresh_indices=False
+    )
+    print(f"\t Indexed {len(documents)} chunks of deck {deck_id}")
+
+
+def schedule_deck_indexing(
+    deck_id: str,
+    slide_content: List[Optional[SlideContent]],
+    summary: Dict[str, Any],
+) -> None:
+    """Index a deck in the background; failures are logged, not raised."""
+
+    async def run() -> None:
+        try:
+            await index_deck(deck_id, slide_content, summary)
+        except Exception as e:
+            print(f"Indexing deck {deck_id} failed: {str(e)}")
+
+    task = asyncio.create_task(run())
+    _pending.add(task)
+    task.add_done_callback(_pending.discard)
+
+
+async def wait_for_indexing() -> None:
+    """Let background indexing finish; called on application shutdown."""
+    if _pending:
+        await asyncio.gather(*_pending, return_exceptions=True)
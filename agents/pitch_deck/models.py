@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any, Tuple, TypedDict
+from typing import List, Literal, Optional, Dict, Any, Tuple, TypedDict
 
 class FounderExperience(BaseModel):
     work_experience: Optional[str] = Field(default=None, alias="Work Experience", description="Work experience of the founder")
@@ -56,7 +56,11 @@ class Traction(BaseModel):
     revenue: Optional[Revenue] = Field(default=None, alias="Revenue", description="Revenue metrics")
 
 class Slide(TypedDict):
-    imageByte: bytes
+    imageRef: str
+    mimeType: str
+    textLayer: Optional[List[str]]
+    pageStats: Optional[Dict[str, Any]]
+    fingerprint: Optional[str]
     slide_type: Optional[str]
     text: Optional[List[str]]
     images: Optional[List[str]]
@@ -69,9 +73,14 @@ class SlideContent(TypedDict):
     text: Optional[List[str]]
     image: Optional[List[str]]
     figure: Optional[List[str]]
+    source: Optional[Literal["text_layer", "vision", "cache"]]
+    duplicate_of: Optional[int]
 
 class GraphState(TypedDict):
+    deck_id: Optional[str]
     slides: List[Slide]
+    # Id of a core.utils.SlideFeed still rendering the slides, if they are not all in `slides` yet
+    slide_feed: Optional[str]
     current_index: int
     summary: Optional[str]
     scorecard: Optional[str]
@@ -89,6 +98,12 @@ class ProcessSlideResponse(BaseModel):
         description="The figure content of the slide"
     )
 
+class BatchProcessSlideResponse(BaseModel):
+    """Respond to the user with this"""
+    slides: List[ProcessSlideResponse] = Field(
+        description="The content of each slide, in the order the slides were given"
+    )
+
 class ScoringResponse(BaseModel):
     """Respond to the user with this"""
     category: str = Field(
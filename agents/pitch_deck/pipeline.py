@@ -0,0 +1,227 @@
+import asyncio
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+from langgraph.config import get_stream_writer
+from pydantic import BaseModel
+
+from core.prompts import SCORING_PROMPT, SCORING_CATEGORY_PROMPT
+from core.settings import settings
+from core.llm import ainvoke_structured, prompt_messages
+from core.utils import SlideFeed
+from agents.pitch_deck.helpers import (
+    SlideDeduplicator,
+    summary_tasks,
+    extract_text_layer,
+    process_single_slide,
+    process_slide_batch,
+    process_summary,
+)
+from agents.pitch_deck.models import (
+    ScoringResponseList,
+    Slide,
+    SlideContent,
+)
+
+# Scoring rubric category -> summary sections it is scored from
+SCORING_CATEGORIES = {
+    "Team": ("Company Overview", "Founder-Market Fit"),
+    "Traction": ("Traction",),
+    "Market Size": ("Market Sizing & Growth",),
+}
+
+
+class StageError(Exception):
+    """A pipeline stage failed; the message is reported as the graph error."""
+
+
+class DeckPipeline:
+    """
+    Runs OCR, summarization and scoring of a deck as a dataflow instead of
+    three barrier-synchronized steps: every slide (or batch of OCR_BATCH_SIZE
+    slides), summary and score is its own task that starts as soon as the
+    inputs it depends on are ready.
+
+    - Slides can come from a `SlideFeed` that is still rendering the PDF; each
+      slide's OCR starts as soon as its page is rendered.
+    - Repeated pages and animation build steps are OCR'd once (see
+      `SlideDeduplicator`) and the result is copied to every copy.
+    - Text-based slides are read from the PDF text layer; only image-heavy
+      slides and slides with charts are sent to the vision model.
+    - A summary starts once the slides it reads are OCR'd (all slides, or the
+      first PIPELINE_OVERVIEW_SLIDES for the Company Overview).
+    - With PIPELINE_SCORE_PER_CATEGORY each rubric category is scored as soon as
+      its summary sections land, otherwise the whole scorecard waits for all
+      four summaries.
+
+    Progress is published on the graph's custom stream.
+    """
+
+    def __init__(self, slides: List[Slide], feed: Optional[SlideFeed] = None):
+        self.feed = feed
+        self.total = feed.total if feed else len(slides)
+        self.slides: List[Slide] = []
+        self.slide_content: List[Optional[SlideContent]] = [None] * self.total
+        self.summary: Dict[str, Any] = {}
+        self.scorecard: List[dict] = []
+        self._given = slides
+        self._scores: Dict[Optional[str], List[dict]] = {}
+        self._copies: Dict[int, List[int]] = {}
+        self._results: Dict[int, Dict[str, Any]] = {}
+        self._slide_ready = [asyncio.Event() for _ in range(self.total)]
+        self._summary_ready = {task[0]: asyncio.Event() for task in summary_tasks}
+        self._write = get_stream_writer()
+
+    async def run(self) -> None:
+        stages = [self._ocr_slides()]
+        stages += [self._summarize(*task) for task in summary_tasks]
+        if settings.PIPELINE_SCORE_PER_CATEGORY:
+            stages += [
+                self._score(category, sections)
+                for category, sections in SCORING_CATEGORIES.items()
+            ]
+        else:
+            stages.append(self._score(None, tuple(self._summary_ready)))
+
+        tasks = [asyncio.ensure_future(stage) for stage in stages]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        sources = [content["source"] for content in self.slide_content]
+        print(
+            "\t OCR paths: "
+            + ", ".join(f"{source}={sources.count(source)}" for source in sorted(set(sources)))
+        )
+
+        self.scorecard = [
+            score
+            for category in (*SCORING_CATEGORIES, None)
+            for score in self._scores.get(category, [])
+        ]
+
+    def _summary_slides(self, summary_type: str) -> Sequence[int]:
+        if summary_type == "Company Overview" and settings.PIPELINE_OVERVIEW_SLIDES:
+            return range(min(self.total, settings.PIPELINE_OVERVIEW_SLIDES))
+        return range(self.total)
+
+    async def _incoming_slides(self) -> AsyncIterator[Slide]:
+        if self.feed is None:
+            for slide in self._given:
+                yield slide
+            return
+        try:
+            async for slide in self.feed:
+                yield slide
+        except Exception as e:
+            raise StageError(f"Failed to render slides: {str(e)}") from e
+
+    async def _ocr_slides(self) -> None:
+        """Start OCR of each unique slide (or batch) as soon as its page has been rendered."""
+        batch_size = max(1, settings.OCR_BATCH_SIZE)
+        deduplicator = SlideDeduplicator()
+        batch: List[int] = []
+        tasks: List[asyncio.Future] = []
+
+        def schedule(settled: List[Tuple[int, int]], flush: bool = False) -> None:
+            for index, representative in settled:
+                if index == representative:
+                    self._copies[index] = [index]
+                    batch.append(index)
+                elif representative in self._results:
+                    self._apply(representative, index, self._results[representative])
+                else:
+                    self._copies[representative].append(index)
+            while len(batch) >= batch_size or (flush and batch):
+                tasks.append(asyncio.ensure_future(self._ocr(batch[:batch_size])))
+                del batch[:batch_size]
+
+        try:
+            async for slide in self._incoming_slides():
+                self.slides.append(slide)
+                schedule(deduplicator.add(slide))
+            schedule(deduplicator.finish(), flush=True)
+            if len(self.slides) != self.total:
+                raise StageError(f"Expected {self.total} slides, got {len(self.slides)}")
+            if len(self._copies) < self.total:
+                print(f"\t OCR {len(self._copies)} unique of {self.total} slides")
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            if self.feed is not None:
+                self.feed.close()
+
+    async def _ocr(self, indices: Sequence[int]) -> None:
+        results = {index: extract_text_layer(self.slides[index]) for index in indices}
+        vision_indices = [index for index, result in results.items() if result is None]
+        try:
+            if len(vision_indices) == 1:
+                results[vision_indices[0]] = await process_single_slide(self.slides[vision_indices[0]])
+            elif vision_indices:
+                batch = await process_slide_batch([self.slides[index] for index in vision_indices])
+                results.update(zip(vision_indices, batch))
+        except Exception as e:
+            label = (
+                f"slide {vision_indices[0] + 1}" if len(vision_indices) == 1
+                else f"slides {vision_indices[0] + 1}-{vision_indices[-1] + 1}"
+            )
+            raise StageError(f"Failed to process {label}: {str(e)}") from e
+
+        for representative, result in results.items():
+            self._results[representative] = result
+            for index in self._copies[representative]:
+                self._apply(representative, index, result)
+
+    def _apply(self, representative: int, index: int, result: Dict[str, Any]) -> None:
+        """Record a slide's OCR, taken from its representative, and mark it ready."""
+        self.slides[index]["text"] = result["text"]
+        self.slides[index]["image"] = result["image"]
+        self.slides[index]["figure"] = result["figure"]
+        self.slide_content[index] = {
+            "index": index,
+            "text": result["text"],
+            "image": result["image"],
+            "figure": result["figure"],
+            "source": result["source"],
+            "duplicate_of": None if index == representative else representative,
+        }
+        self._slide_ready[index].set()
+        print(f"\t Processed slide {index + 1}/{self.total}")
+        self._write({"stage": "ocr", "slide": self.slide_content[index], "total": self.total})
+
+    async def _summarize(self, summary_type: str, schema: type[BaseModel], prompt: str) -> None:
+        indices = self._summary_slides(summary_type)
+        for index in indices:
+            await self._slide_ready[index].wait()
+
+        result_type, result = await process_summary(
+            summary_type, schema, prompt, [self.slide_content[index] for index in indices]
+        )
+        self.summary[result_type] = result
+        self._summary_ready[summary_type].set()
+        print(f"\t Processed {result_type} summary")
+        self._write({"stage": "summary", "section": result_type})
+
+    async def _score(self, category: Optional[str], sections: Sequence[str]) -> None:
+        for section in sections:
+            await self._summary_ready[section].wait()
+
+        pitch_information = str({section: self.summary[section] for section in sections})
+        if category:
+            pitch_information += SCORING_CATEGORY_PROMPT.format(category=category)
+        try:
+            scorecard = await ainvoke_structured(
+                "openai", ScoringResponseList, prompt_messages(SCORING_PROMPT, pitch_information)
+            )
+        except Exception as e:
+            raise StageError(f"Scoring Task failed: {str(e)}") from e
+
+        scores = [dict(score) for score in scorecard.scores]
+        if category:
+            # Guard against the model rating categories it was not asked about
+            scores = [score for score in scores if score["category"] == category] or scores[:1]
+        self._scores[category] = scores
+        print(f"\t Scored {category or 'all categories'}")
+        self._write({"stage": "score", "category": category, "scores": scores})
@@ -0,0 +1,48 @@
+# Compiled agent graphs, each imported and built on first use so that starting
+# the API does not pay for (or fail on) agents and clients it has not needed yet.
+import importlib
+from functools import lru_cache
+
+from langgraph.graph.state import CompiledStateGraph
+
+from core.checkpoint import attach_checkpointer
+from core.clients import get_chat_model, get_embeddings, get_http_client, get_vision_model
+
+# Agent name -> (module, attribute) of its compiled graph
+AGENTS = {
+    "pitch_deck": ("agents.pitch_deck.agent", "pitch_deck_agent"),
+    "market_size": ("agents.market_size.agent", "market_research_agent"),
+    "github_repo": ("agents.github_repo.agent", "github_repo_agent"),
+    "chatbot_qa": ("agents.chatbot_qa.agent", "qa_agent"),
+    "supervisor": ("agents.supervisor.agent", "supervisor_agent"),
+}
+
+
+@lru_cache(maxsize=None)
+def get_agent(name: str) -> CompiledStateGraph:
+    module, attribute = AGENTS[name]
+    graph = getattr(importlib.import_module(module), attribute)
+    attach_checkpointer(graph)
+    return graph
+
+
+def warm_up() -> None:
+    """
+    Build every agent graph and the shared model clients ahead of the first
+    request. Run on startup with WARM_UP_ON_STARTUP, or call it explicitly.
+    No network connections are opened.
+    """
+    for name in AGENTS:
+        get_agent(name)
+    get_http_client()
+    get_chat_model()
+    get_vision_model()
+    get_embeddings()
+
+
+if __name__ == "__main__":
+    import time
+
+    started = time.perf_counter()
+    warm_up()
+    print(f"Warmed up {len(AGENTS)} agents in {time.perf_counter() - started:.2f}s")
@@ -1,7 +1,7 @@
 
 from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph
-from langgraph.checkpoint.memory import MemorySaver
+from core.checkpoint import build_checkpointer
 
 from agents.supervisor.models import (
     GraphState,
@@ -12,7 +12,7 @@ from agents.supervisor.nodes import (
     analyze_market,
     analyze_github,
     end_state,
-    should_continue,
+    route_analyses,
 )
 
 graph = StateGraph(GraphState)
@@ -24,32 +24,15 @@ graph.add_node("end", RunnableLambda(end_state))
 
 graph.set_entry_point("pitch_deck_analysis")
 
+# Market research and GitHub analysis only need the pitch deck summary,
+# so they run as parallel branches that join again at "end"
 graph.add_conditional_edges(
     "pitch_deck_analysis",
-    should_continue,
-    {
-        "continue": "market_analysis_node",
-        "end": "end"
-    }
+    route_analyses,
+    ["market_analysis_node", "github_analysis", "end"],
 )
 
-graph.add_conditional_edges(
-    "market_analysis_node",
-    should_continue,
-    {
-        "continue": "github_analysis",
-        "end": "end"
-    }
-)
-
-graph.add_conditional_edges(
-    "github_analysis",
-    should_continue,
-    {
-        "continue": "end",
-        "end": "end"
-    }
-)
+graph.add_edge(["market_analysis_node", "github_analysis"], "end")
 
 graph.set_finish_point("end")
-supervisor_agent = graph.compile(checkpointer=MemorySaver())
\ No newline at end of file
+supervisor_agent = graph.compile(checkpointer=build_checkpointer(one_shot=True))
\ No newline at end of file
@@ -1,6 +1,6 @@
 # supervisor/models.py
 
-from typing import TypedDict, List, Optional, Dict
+from typing import Annotated, TypedDict, List, Optional, Dict
 from pydantic import BaseModel, Field
 
 # Import relevant models from other agents
@@ -61,10 +61,16 @@ class SupervisorResponse(BaseModel):
         description="Whether the company is a tech/SaaS company"
     )
 
+def keep_first_error(current: Optional[str], update: Optional[str]) -> Optional[str]:
+    """Reducer letting parallel branches report errors without overwriting each other"""
+    return current or update
+
 class GraphState(TypedDict):
     """State management for the supervisor agent"""
     # Input data
+    deck_id: Optional[str]
     slides: List[Slide]
+    slide_feed: Optional[str]
     
     # Pitch deck analysis results
     summary: Optional[Dict]
@@ -83,7 +89,7 @@ class GraphState(TypedDict):
     
     # Status flags
     is_tech_company: bool
-    error: Optional[str]
+    error: Annotated[Optional[str], keep_first_error]
 
 class SupervisorState(TypedDict):
     """Complete state including all analyses"""
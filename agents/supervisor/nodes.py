@@ -1,8 +1,11 @@
-from typing import Literal, Union
+import asyncio
+import re
+from typing import Dict, List, Literal, Optional, Tuple, Union
 
-from agents.pitch_deck.agent import pitch_deck_agent
-from agents.market_size.agent import market_research_agent
-from agents.github_repo.agent import github_repo_agent
+from langchain_core.runnables import RunnableConfig
+from langgraph.config import get_stream_writer
+
+from agents.registry import get_agent
 from agents.supervisor.models import (
     GraphState,
     SupervisorResponse,
@@ -11,54 +14,90 @@ from agents.supervisor.models import (
     GitHubAnalysis
 )
 
-def analyze_pitch_deck(state: GraphState) -> GraphState:
+GITHUB_URL_PATTERN = r'https?://(?:www\.)?github\.com/[\w-]+(?:/[\w-]+)?'
+
+TECH_KEYWORDS = ["saas", "software", "platform", "tech", "technology", 
+                 "open source", "api", "cloud", "digital", "ai", 
+                 "machine learning", "blockchain"]
+
+# GitHub analyses started while the pitch deck is still being summarized: thread id -> (url, task)
+_github_prefetch: Dict[str, Tuple[str, asyncio.Task]] = {}
+
+def _thread_id(config: RunnableConfig) -> Optional[str]:
+    return (config or {}).get("configurable", {}).get("thread_id")
+
+def _cancel_github_prefetch(thread_id: Optional[str]) -> None:
+    prefetch = _github_prefetch.pop(thread_id, None) if thread_id else None
+    if prefetch is not None:
+        prefetch[1].cancel()
+
+async def analyze_pitch_deck(state: GraphState, config: RunnableConfig) -> dict:
     """
     Analyzes the pitch deck and extracts key information.
     
+    As soon as the OCR of a slide surfaces a GitHub URL, the GitHub analysis is
+    started in the background so it overlaps with the rest of the deck analysis.
+    Progress events of the pitch deck pipeline are forwarded to this graph's
+    custom stream.
+    
     Args:
         state (GraphState): Current state containing slides data
+        config (RunnableConfig): Run configuration carrying the thread id
         
     Returns:
-        GraphState: Updated state with pitch deck analysis results
+        dict: State update with pitch deck analysis results
     """
+    thread_id = _thread_id(config)
+    write = get_stream_writer()
     try:
-        
-        result = pitch_deck_agent.invoke({
-            "slides": state["slides"]
-        })
+        result = {}
+        async for mode, chunk in get_agent("pitch_deck").astream(
+            {"deck_id": state.get("deck_id"), "slides": state["slides"], "slide_feed": state.get("slide_feed")},
+            stream_mode=["values", "custom"],
+        ):
+            if mode == "values":
+                result = chunk
+                continue
+            write(chunk)
+            if thread_id and thread_id not in _github_prefetch and chunk.get("stage") == "ocr":
+                github_urls = re.findall(GITHUB_URL_PATTERN, str(chunk["slide"]))
+                if github_urls:
+                    _github_prefetch[thread_id] = (
+                        github_urls[0],
+                        asyncio.create_task(get_agent("github_repo").ainvoke({"link": github_urls[0]})),
+                    )
         
         if "error" in result:
-            state["error"] = result["error"]
-            return state
+            _cancel_github_prefetch(thread_id)
+            return {"error": result["error"]}
         
-        # Update state with pitch deck analysis results
-        state["summary"] = result["summary"]
-        state["scorecard"] = result["scorecard"]
-        state["slide_content"] = result.get("slide_content", [])
+        update = {
+            "summary": result["summary"],
+            "scorecard": result["scorecard"],
+            "slide_content": result.get("slide_content", []),
+        }
         
         # Determine if it's a tech company
-        tech_keywords = ["saas", "software", "platform", "tech", "technology", 
-                        "open source", "api", "cloud", "digital", "ai", 
-                        "machine learning", "blockchain"]
-        
         summary_text = str(result["summary"]).lower()
-        state["is_tech_company"] = any(keyword in summary_text for keyword in tech_keywords)
+        update["is_tech_company"] = any(keyword in summary_text for keyword in TECH_KEYWORDS)
         
-        # Extract GitHub URL if present
-        import re
-        github_pattern = r'https?://(?:www\.)?github\.com/[\w-]+(?:/[\w-]+)?'
-        github_urls = re.findall(github_pattern, str(result["summary"]))
+        # Extract GitHub URL if present, falling back to the one found in the slides
+        github_urls = re.findall(GITHUB_URL_PATTERN, str(result["summary"]))
         if github_urls:
-            state["github_url"] = github_urls[0]
+            update["github_url"] = github_urls[0]
+        elif thread_id in _github_prefetch:
+            update["github_url"] = _github_prefetch[thread_id][0]
             
-        return state
+        return update
         
+    except asyncio.CancelledError:
+        _cancel_github_prefetch(thread_id)
+        raise
     except Exception as e:
-        error_msg = f"Pitch deck analysis failed: {str(e)}"
-        state["error"] = error_msg
-        return state
+        _cancel_github_prefetch(thread_id)
+        return {"error": f"Pitch deck analysis failed: {str(e)}"}
 
-def analyze_market(state: GraphState) -> GraphState:
+async def analyze_market(state: GraphState) -> dict:
     """
     Performs market analysis based on pitch deck summary.
     
@@ -66,64 +105,73 @@ def analyze_market(state: GraphState) -> GraphState:
         state (GraphState): Current state containing pitch deck summary
         
     Returns:
-        GraphState: Updated state with market analysis results
+        dict: State update with market analysis results
     """
     try:
         
         if not state["summary"]:
             raise ValueError("No pitch deck summary available for market analysis")
             
-        result = market_research_agent.invoke({
+        result = await get_agent("market_size").ainvoke({
             "input_overview": state["summary"]
         })
         
         if "error" in result:
-            state["error"] = result["error"]
-            return state
+            return {"error": result["error"]}
             
-        # Update state with market analysis results
-        state["sector"] = result["sector"]
-        state["market_size"] = result["market_size"]
-        state["competitors"] = result["competitors"]
-        
-        return state
+        return {
+            "sector": result["sector"],
+            "market_size": result["market_size"],
+            "competitors": result["competitors"],
+        }
         
     except Exception as e:
-        error_msg = f"Market analysis failed: {str(e)}"
-        state["error"] = error_msg
-        return state
+        return {"error": f"Market analysis failed: {str(e)}"}
 
-def analyze_github(state: GraphState) -> GraphState:
+async def analyze_github(state: GraphState, config: RunnableConfig) -> dict:
     """
-    Analyzes GitHub repository if applicable.
+    Analyzes GitHub repository if applicable, reusing the analysis started
+    during OCR when there is one.
     
     Args:
         state (GraphState): Current state containing GitHub URL
+        config (RunnableConfig): Run configuration carrying the thread id
         
     Returns:
-        GraphState: Updated state with GitHub analysis results
+        dict: State update with GitHub analysis results
     """
+    thread_id = _thread_id(config)
     try:
         if not state["is_tech_company"] or not state.get("github_url"):
-            return state
+            _cancel_github_prefetch(thread_id)
+            return {}
             
-        
-        result = github_repo_agent.invoke({
-            "link": state["github_url"]
-        })
+        prefetch = _github_prefetch.pop(thread_id, None) if thread_id else None
+        if prefetch is not None and prefetch[0] == state["github_url"]:
+            result = await prefetch[1]
+        else:
+            if prefetch is not None:
+                prefetch[1].cancel()
+            result = await get_agent("github_repo").ainvoke({
+                "link": state["github_url"]
+            })
         
         if "error" in result:
-            state["error"] = result["error"]
-            return state
+            return {"error": result["error"]}
             
-        state["github_details"] = result["repo"]
-        
-        return state
+        return {"github_details": result["repo"]}
         
     except Exception as e:
-        error_msg = f"GitHub analysis failed: {str(e)}"
-        state["error"] = error_msg
-        return state
+        return {"error": f"GitHub analysis failed: {str(e)}"}
+
+def route_analyses(state: GraphState) -> Union[List[str], Literal["end"]]:
+    """
+    Fans out to the market and GitHub analyses, which only depend on the
+    pitch deck summary, unless the pitch deck analysis failed.
+    """
+    if state.get("error"):
+        return "end"
+    return ["market_analysis_node", "github_analysis"]
 
 def should_continue(state: GraphState) -> Union[Literal["continue"], Literal["end"]]:
     """
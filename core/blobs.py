@@ -0,0 +1,110 @@
+import asyncio
+import base64
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from core.settings import settings
+
+
+class BlobStore:
+    """
+    Content-addressed store for rendered slide images.
+
+    Graph state and checkpoints carry only the SHA-256 reference returned by
+    `put`; the bytes are kept in a memory LRU bounded by `max_memory_bytes` and
+    written through to `path`, so references stay resolvable after eviction or
+    a restart. Files not written for `ttl_seconds` are pruned.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_memory_bytes: int = 0,
+        ttl_seconds: int | None = None,
+    ):
+        self.path = path
+        self.max_memory_bytes = max_memory_bytes
+        self.ttl_seconds = ttl_seconds
+        self._memory: OrderedDict[str, bytes] = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._pruned_at = 0.0
+
+    def _file(self, ref: str) -> str:
+        if len(ref) != 64 or not all(c in "0123456789abcdef" for c in ref):
+            raise ValueError(f"Invalid blob reference: {ref}")
+        return os.path.join(self.path, ref[:2], ref)
+
+    def _remember(self, ref: str, data: bytes) -> None:
+        with self._lock:
+            if ref in self._memory:
+                self._memory.move_to_end(ref)
+                return
+            self._memory[ref] = data
+            self._memory_bytes += len(data)
+            while self._memory and self._memory_bytes > self.max_memory_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= len(evicted)
+
+    def put(self, data: bytes) -> str:
+        ref = hashlib.sha256(data).hexdigest()
+        file = self._file(ref)
+        if os.path.exists(file):
+            os.utime(file)
+        else:
+            os.makedirs(os.path.dirname(file), exist_ok=True)
+            tmp = f"{file}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, file)
+        self._remember(ref, data)
+        self._maybe_prune()
+        return ref
+
+    def get(self, ref: str) -> bytes:
+        with self._lock:
+            data = self._memory.get(ref)
+        if data is None:
+            with open(self._file(ref), "rb") as f:
+                data = f.read()
+        self._remember(ref, data)
+        return data
+
+    def _maybe_prune(self) -> None:
+        now = time.time()
+        if not self.ttl_seconds or now - self._pruned_at < min(self.ttl_seconds, 3600):
+            return
+        self._pruned_at = now
+        for root, _, files in os.walk(self.path):
+            for name in files:
+                file = os.path.join(root, name)
+                try:
+                    if now - os.path.getmtime(file) > self.ttl_seconds:
+                        os.remove(file)
+                except FileNotFoundError:
+                    pass
+
+    async def aput(self, data: bytes) -> str:
+        return await asyncio.to_thread(self.put, data)
+
+    async def aget(self, ref: str) -> bytes:
+        with self._lock:
+            data = self._memory.get(ref)
+        if data is not None:
+            return data
+        return await asyncio.to_thread(self.get, ref)
+
+    async def data_url(self, ref: str, mime_type: str) -> str:
+        """Base64 data URL of a blob, built only when it is sent to a model."""
+        data = await self.aget(ref)
+        return f"data:{mime_type};base64,{base64.b64encode(data).decode('utf-8')}"
+
+
+blob_store = BlobStore(
+    settings.BLOB_STORE_PATH,
+    max_memory_bytes=settings.BLOB_MEMORY_MAX_BYTES,
+    ttl_seconds=settings.BLOB_STORE_TTL_SECONDS,
+)
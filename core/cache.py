@@ -0,0 +1,263 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Sequence
+
+from core import prompts
+from core.schema import RenderOptions
+from core.settings import settings
+
+
+class SQLiteCache:
+    """
+    Small persistent key/value cache backed by a SQLite table.
+
+    Values are stored as JSON. Entries older than `ttl_seconds` are treated as
+    misses and removed, and once the table holds more than `max_entries` rows
+    or `max_bytes` of values the least recently used ones are evicted. The
+    row count and byte total are maintained incrementally, so a write costs
+    the same however large the table is.
+    """
+
+    # Keys per IN (...) lookup, under SQLite's bound parameter limit
+    MAX_VARIABLES = 500
+
+    def __init__(
+        self,
+        path: str,
+        namespace: str,
+        ttl_seconds: int | None = None,
+        max_entries: int | None = None,
+        max_bytes: int | None = None,
+    ):
+        if not namespace.isidentifier():
+            raise ValueError(f"Invalid cache namespace: {namespace}")
+        self.path = path
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            table = self.namespace
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL DEFAULT 0, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            # Tables created before the size column was added
+            if "size" not in {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN size INTEGER NOT NULL DEFAULT 0")
+                conn.execute(f"UPDATE {table} SET size = LENGTH(CAST(value AS BLOB))")
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_accessed_at ON {table} (accessed_at)")
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_created_at ON {table} (created_at)")
+            # Entry count and byte total, kept up to date by triggers so that
+            # eviction never has to scan the table
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table}_totals ("
+                "id INTEGER PRIMARY KEY CHECK (id = 0), entries INTEGER NOT NULL, bytes INTEGER NOT NULL)"
+            )
+            conn.execute(
+                f"INSERT OR IGNORE INTO {table}_totals "
+                f"SELECT 0, COUNT(*), COALESCE(SUM(size), 0) FROM {table}"
+            )
+            conn.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {table}_inserted AFTER INSERT ON {table} BEGIN "
+                f"UPDATE {table}_totals SET entries = entries + 1, bytes = bytes + NEW.size; END"
+            )
+            conn.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {table}_deleted AFTER DELETE ON {table} BEGIN "
+                f"UPDATE {table}_totals SET entries = entries - 1, bytes = bytes - OLD.size; END"
+            )
+            conn.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {table}_resized AFTER UPDATE OF size ON {table} BEGIN "
+                f"UPDATE {table}_totals SET bytes = bytes + NEW.size - OLD.size; END"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> Any | None:
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: Sequence[str]) -> dict[str, Any]:
+        """Values of the keys found, looked up and marked as used in one transaction."""
+        now = time.time()
+        keys = list(dict.fromkeys(keys))
+        rows = []
+        with self._lock:
+            conn = self._connection()
+            for start in range(0, len(keys), self.MAX_VARIABLES):
+                chunk = keys[start:start + self.MAX_VARIABLES]
+                rows += conn.execute(
+                    f"SELECT key, value, created_at FROM {self.namespace} "
+                    f"WHERE key IN ({', '.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall()
+            expired = {
+                key for key, _, created_at in rows
+                if self.ttl_seconds and now - created_at > self.ttl_seconds
+            }
+            found = {key: value for key, value, _ in rows if key not in expired}
+            if expired:
+                conn.executemany(
+                    f"DELETE FROM {self.namespace} WHERE key = ?", [(key,) for key in expired]
+                )
+            if found:
+                conn.executemany(
+                    f"UPDATE {self.namespace} SET accessed_at = ? WHERE key = ?",
+                    [(now, key) for key in found],
+                )
+            if expired or found:
+                conn.commit()
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return {key: json.loads(value) for key, value in found.items()}
+
+    def set(self, key: str, value: Any) -> None:
+        self.set_many({key: value})
+
+    def set_many(self, items: dict[str, Any]) -> None:
+        """Store several values in one transaction with a single eviction pass."""
+        if not items:
+            return
+        now = time.time()
+        payloads = [(key, json.dumps(value)) for key, value in items.items()]
+        with self._lock:
+            conn = self._connection()
+            conn.executemany(
+                f"INSERT INTO {self.namespace} (key, value, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?) ON CONFLICT (key) DO UPDATE SET value = excluded.value, "
+                "size = excluded.size, created_at = excluded.created_at, accessed_at = excluded.accessed_at",
+                [(key, payload, len(payload.encode("utf-8")), now, now) for key, payload in payloads],
+            )
+            self._evict(conn, now)
+            conn.commit()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.execute(f"DELETE FROM {self.namespace} WHERE key = ?", (key,))
+            conn.commit()
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        if self.ttl_seconds:
+            conn.execute(
+                f"DELETE FROM {self.namespace} WHERE created_at < ?",
+                (now - self.ttl_seconds,),
+            )
+        if not self.max_entries and not self.max_bytes:
+            return
+        entries, size = conn.execute(
+            f"SELECT entries, bytes FROM {self.namespace}_totals"
+        ).fetchone()
+        excess_entries = entries - self.max_entries if self.max_entries else 0
+        excess_bytes = size - self.max_bytes if self.max_bytes else 0
+        if excess_entries <= 0 and excess_bytes <= 0:
+            return
+        # Walk the least recently used entries only as far as needed
+        evicted = []
+        cursor = conn.execute(f"SELECT key, size FROM {self.namespace} ORDER BY accessed_at")
+        for key, entry_size in cursor:
+            if excess_entries <= 0 and excess_bytes <= 0:
+                break
+            evicted.append((key,))
+            excess_entries -= 1
+            excess_bytes -= entry_size
+        cursor.close()
+        conn.executemany(f"DELETE FROM {self.namespace} WHERE key = ?", evicted)
+
+    async def aget(self, key: str) -> Any | None:
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, value: Any) -> None:
+        await asyncio.to_thread(self.set, key, value)
+
+    async def aget_many(self, keys: Sequence[str]) -> dict[str, Any]:
+        return await asyncio.to_thread(self.get_many, keys)
+
+    async def aset_many(self, items: dict[str, Any]) -> None:
+        await asyncio.to_thread(self.set_many, items)
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+def hash_text(*parts: str) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _prompts_fingerprint() -> str:
+    return hash_text(*(
+        f"{name}={value}"
+        for name, value in sorted(vars(prompts).items())
+        if name.isupper() and isinstance(value, str)
+    ))
+
+
+def deck_cache_key(pdf_bytes: bytes, analysis: str, render_options: RenderOptions) -> str:
+    """
+    Key a deck analysis by the PDF contents and everything that shapes the result:
+    the analysis kind, the prompts, the models, how slides were rendered and
+    the settings that decide how they are OCR'd, routed and scored. The vector
+    index the deck's chunks were written to is part of the key too, since a
+    cache hit returns a `deck_id` without indexing the deck again.
+    """
+    vector_location = (
+        settings.LOCAL_VECTOR_PATH if settings.VECTOR_BACKEND == "local" else settings.ELASTIC_SEARCH_URL
+    )
+    return hash_text(
+        hashlib.sha256(pdf_bytes).hexdigest(),
+        analysis,
+        _prompts_fingerprint(),
+        str(settings.TEXT_MODEL),
+        str(settings.VISION_MODEL),
+        render_options.model_dump_json(),
+        str((
+            settings.TEXT_LAYER_ENABLED,
+            settings.TEXT_LAYER_MIN_CHARS,
+            settings.TEXT_LAYER_MAX_IMAGE_RATIO,
+            settings.TEXT_LAYER_MAX_DRAWINGS,
+        )),
+        str((
+            settings.DEDUP_SLIDES_ENABLED,
+            settings.DEDUP_MAX_HASH_DISTANCE,
+            settings.OCR_BATCH_SIZE,
+            settings.SUMMARY_CONTEXT_ROUTING,
+            settings.SUMMARY_CONTEXT_MAX_TOKENS,
+            settings.PIPELINE_OVERVIEW_SLIDES,
+            settings.PIPELINE_SCORE_PER_CATEGORY,
+        )),
+        str((
+            settings.VECTOR_BACKEND,
+            vector_location,
+            settings.VECTOR_INDEX_NAME,
+            settings.EMBEDDINGS_MODEL,
+        )),
+    )
+
+
+deck_cache = SQLiteCache(
+    settings.CACHE_DB_PATH,
+    "deck_results",
+    ttl_seconds=settings.DECK_CACHE_TTL_SECONDS,
+    max_entries=settings.DECK_CACHE_MAX_ENTRIES,
+)
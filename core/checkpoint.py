@@ -0,0 +1,118 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph.state import CompiledStateGraph
+
+from core.settings import settings
+
+# Open on-disk checkpointer and the graphs compiled before it was opened
+_sqlite_saver: BaseCheckpointSaver | None = None
+_awaiting_checkpointer: list[CompiledStateGraph] = []
+
+
+class BoundedMemorySaver(MemorySaver):
+    """
+    In-memory checkpointer that forgets whole threads once there are more than
+    `max_threads` of them or they have not been written to for `ttl_seconds`.
+    """
+
+    def __init__(self, *, max_threads: int | None = None, ttl_seconds: int | None = None):
+        super().__init__()
+        self.max_threads = max_threads
+        self.ttl_seconds = ttl_seconds
+        self._threads: OrderedDict[str, float] = OrderedDict()
+        self._threads_lock = threading.Lock()
+
+    def put(self, config: RunnableConfig, *args: Any, **kwargs: Any) -> RunnableConfig:
+        result = super().put(config, *args, **kwargs)
+        self._touch(config["configurable"]["thread_id"])
+        return result
+
+    def put_writes(self, config: RunnableConfig, *args: Any, **kwargs: Any) -> None:
+        super().put_writes(config, *args, **kwargs)
+        self._touch(config["configurable"]["thread_id"])
+
+    def _touch(self, thread_id: str) -> None:
+        now = time.monotonic()
+        with self._threads_lock:
+            self._threads[thread_id] = now
+            self._threads.move_to_end(thread_id)
+            expired = []
+            if self.ttl_seconds:
+                for candidate, touched_at in self._threads.items():
+                    if now - touched_at <= self.ttl_seconds:
+                        break
+                    expired.append(candidate)
+            overflow = len(self._threads) - len(expired) - (self.max_threads or len(self._threads))
+            if overflow > 0:
+                expired.extend(list(self._threads)[len(expired):len(expired) + overflow])
+            for candidate in expired:
+                del self._threads[candidate]
+                self._drop_thread(candidate)
+
+    def _drop_thread(self, thread_id: str) -> None:
+        self.storage.pop(thread_id, None)
+        for key in [key for key in self.writes if key[0] == thread_id]:
+            del self.writes[key]
+        for key in [key for key in self.blobs if key[0] == thread_id]:
+            del self.blobs[key]
+
+
+def build_checkpointer(one_shot: bool = False) -> BaseCheckpointSaver | bool | None:
+    """
+    Checkpointer to compile a graph with, based on `settings.CHECKPOINTER`.
+
+    One-shot graphs (a fresh thread per request, never resumed) are compiled
+    without checkpointing unless `CHECKPOINT_ONE_SHOT_GRAPHS` is set, or when
+    `CHECKPOINTER` is "none". Multi-turn graphs always keep their threads, in
+    memory if "none" is set. The SQLite backend needs a running event loop, so
+    those graphs are compiled without a checkpointer here and get one through
+    `attach_checkpointer`.
+    """
+    if one_shot and (not settings.CHECKPOINT_ONE_SHOT_GRAPHS or settings.CHECKPOINTER == "none"):
+        return False
+    if settings.CHECKPOINTER == "sqlite":
+        return None
+    return BoundedMemorySaver(
+        max_threads=settings.CHECKPOINT_MAX_THREADS,
+        ttl_seconds=settings.CHECKPOINT_TTL_SECONDS,
+    )
+
+
+def attach_checkpointer(graph: CompiledStateGraph) -> None:
+    """Give a graph compiled for the SQLite backend the on-disk checkpointer, once it is open."""
+    if graph.checkpointer is not None:
+        return
+    if _sqlite_saver is not None:
+        graph.checkpointer = _sqlite_saver
+    else:
+        _awaiting_checkpointer.append(graph)
+
+
+@asynccontextmanager
+async def sqlite_checkpointer():
+    """Open the on-disk checkpointer for the application's lifetime."""
+    global _sqlite_saver
+    if settings.CHECKPOINTER != "sqlite":
+        yield
+    else:
+        from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+        directory = os.path.dirname(settings.CHECKPOINT_DB_PATH)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        async with AsyncSqliteSaver.from_conn_string(settings.CHECKPOINT_DB_PATH) as saver:
+            _sqlite_saver = saver
+            while _awaiting_checkpointer:
+                _awaiting_checkpointer.pop().checkpointer = saver
+            try:
+                yield
+            finally:
+                _sqlite_saver = None
@@ -0,0 +1,157 @@
+# Process-wide registry of model, search and storage clients. Each client is
+# built once on first use and shared by every agent. Provider SDKs are also
+# imported on first use, so importing this module stays cheap.
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+from pydantic import BaseModel
+
+from core.settings import settings
+
+if TYPE_CHECKING:
+    import httpx
+    from elasticsearch import AsyncElasticsearch
+    from firecrawl import AsyncFirecrawlApp
+    from langchain_community.tools.tavily_search import TavilySearchResults
+    from langchain_core.runnables import Runnable
+    from langchain_core.vectorstores import VectorStore
+    from langchain_elasticsearch import AsyncElasticsearchStore
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    from langchain_openai import ChatOpenAI
+
+    from core.embeddings import CachedEmbeddings
+
+
+@lru_cache(maxsize=None)
+def get_http_client() -> httpx.AsyncClient:
+    """Pooled keep-alive HTTP client shared by the OpenAI chat and embedding clients."""
+    import httpx
+
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(settings.HTTP_TIMEOUT),
+    )
+
+
+@lru_cache(maxsize=None)
+def get_chat_model(model: str | None = None, temperature: float = 0) -> ChatOpenAI:
+    from langchain_openai import ChatOpenAI
+
+    return ChatOpenAI(
+        model=model or settings.TEXT_MODEL,
+        temperature=temperature,
+        http_async_client=get_http_client(),
+        # Retries are scheduled by core.ratelimit, which also honors Retry-After
+        max_retries=0,
+    )
+
+
+@lru_cache(maxsize=None)
+def get_structured_model(
+    schema: type[BaseModel], model: str | None = None, temperature: float = 0
+) -> Runnable:
+    return get_chat_model(model, temperature).with_structured_output(schema)
+
+
+@lru_cache(maxsize=None)
+def get_vision_model(model: str | None = None) -> ChatGoogleGenerativeAI:
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    return ChatGoogleGenerativeAI(
+        model=model or settings.VISION_MODEL,
+        google_api_key=settings.GOOGLE_API_KEY,
+        # A single attempt; retries are scheduled by core.ratelimit
+        max_retries=1,
+    )
+
+
+@lru_cache(maxsize=None)
+def get_structured_vision_model(schema: type[BaseModel], model: str | None = None) -> Runnable:
+    return get_vision_model(model).with_structured_output(schema)
+
+
+@lru_cache(maxsize=None)
+def get_embeddings() -> CachedEmbeddings:
+    """
+    The one embedding model, EMBEDDINGS_MODEL, used both to index decks and to
+    embed chat queries, so stored and query vectors always come from the same model.
+    """
+    from langchain_openai import OpenAIEmbeddings
+
+    from core.embeddings import CachedEmbeddings, embedding_cache
+
+    if not settings.EMBEDDINGS_MODEL:
+        raise ValueError("EMBEDDINGS_MODEL is not set")
+    return CachedEmbeddings(
+        OpenAIEmbeddings(
+            model=settings.EMBEDDINGS_MODEL,
+            http_async_client=get_http_client(),
+            chunk_size=settings.EMBEDDINGS_BATCH_SIZE,
+            # Retries are scheduled by core.ratelimit
+            max_retries=0,
+        ),
+        settings.EMBEDDINGS_MODEL,
+        cache=embedding_cache if settings.EMBEDDINGS_CACHE_ENABLED else None,
+        batch_size=settings.EMBEDDINGS_BATCH_SIZE,
+        memory_size=settings.EMBEDDINGS_MEMORY_CACHE_SIZE,
+    )
+
+
+@lru_cache(maxsize=None)
+def get_search_tool() -> TavilySearchResults:
+    from langchain_community.tools.tavily_search import TavilySearchResults
+
+    return TavilySearchResults(k=3)
+
+
+@lru_cache(maxsize=None)
+def get_firecrawl() -> AsyncFirecrawlApp:
+    from firecrawl import AsyncFirecrawlApp
+
+    return AsyncFirecrawlApp(api_key=settings.FIRECRAWL_API_KEY)
+
+
+@lru_cache(maxsize=None)
+def get_elasticsearch() -> AsyncElasticsearch:
+    from elasticsearch import AsyncElasticsearch
+
+    return AsyncElasticsearch(
+        hosts=[settings.ELASTIC_SEARCH_URL],
+        api_key=settings.ELASTIC_SEARCH_API,
+        connections_per_node=settings.HTTP_MAX_CONNECTIONS,
+    )
+
+
+@lru_cache(maxsize=None)
+def get_vector_store(index_name: str) -> AsyncElasticsearchStore | VectorStore:
+    """Vector index for retrieval; Elasticsearch, or an embedded one with VECTOR_BACKEND=local."""
+    if settings.VECTOR_BACKEND == "local":
+        import os
+
+        from core.vectorstore import LocalVectorStore
+
+        return LocalVectorStore(
+            os.path.join(settings.LOCAL_VECTOR_PATH, index_name), get_embeddings()
+        )
+
+    from langchain_elasticsearch import AsyncElasticsearchStore
+
+    return AsyncElasticsearchStore(
+        index_name=index_name,
+        embedding=get_embeddings(),
+        es_connection=get_elasticsearch(),
+    )
+
+
+async def aclose_clients() -> None:
+    """Close pooled connections; called on application shutdown."""
+    if get_elasticsearch.cache_info().currsize:
+        await get_elasticsearch().close()
+    if get_http_client.cache_info().currsize:
+        await get_http_client().aclose()
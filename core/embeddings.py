@@ -0,0 +1,136 @@
+import asyncio
+import base64
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from core.cache import SQLiteCache, hash_text
+from core.ratelimit import call_with_limits, estimate_tokens
+from core.settings import settings
+
+
+def _encode(vector: List[float]) -> str:
+    return base64.b64encode(np.asarray(vector, dtype=np.float32).tobytes()).decode("ascii")
+
+
+def _decode(payload: str) -> List[float]:
+    return np.frombuffer(base64.b64decode(payload), dtype=np.float32).tolist()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embedding service shared by deck indexing and chat retrieval.
+
+    Texts are looked up by (model, text hash) in an in-memory LRU, then in a
+    persistent cache with one query per call; only the misses are sent to the provider, deduplicated
+    and in batches of up to `batch_size` inputs, each under the provider's
+    rate limits. Vectors are stored as float32.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        model: str,
+        cache: Optional[SQLiteCache] = None,
+        batch_size: int = 2048,
+        memory_size: int = 4096,
+        provider: str = "openai",
+    ):
+        self.embeddings = embeddings
+        self.model = model
+        self.cache = cache
+        self.batch_size = batch_size
+        self.memory_size = memory_size
+        self.provider = provider
+        self._memory: OrderedDict[str, List[float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _key(self, text: str) -> str:
+        return hash_text(self.model, text)
+
+    def _remember(self, key: str, vector: List[float]) -> None:
+        with self._lock:
+            self._memory[key] = vector
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
+
+    def _store(self, embedded: dict[str, List[float]]) -> None:
+        keyed = {self._key(text): vector for text, vector in embedded.items()}
+        for key, vector in keyed.items():
+            self._remember(key, vector)
+        if self.cache:
+            self.cache.set_many({key: _encode(vector) for key, vector in keyed.items()})
+
+    def _misses(self, texts: List[str]) -> tuple[List[Optional[List[float]]], List[str]]:
+        """Cached vectors (None for misses) and the distinct texts still to embed."""
+        keys = [self._key(text) for text in texts]
+        found: dict[str, List[float]] = {}
+        with self._lock:
+            for key in keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+        remaining = [key for key in keys if key not in found]
+        if self.cache and remaining:
+            for key, payload in self.cache.get_many(remaining).items():
+                found[key] = _decode(payload)
+                self._remember(key, found[key])
+        vectors = [found.get(key) for key in keys]
+        missing = list(dict.fromkeys(text for text, vector in zip(texts, vectors) if vector is None))
+        return vectors, missing
+
+    def _batches(self, texts: List[str]) -> List[List[str]]:
+        return [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+
+    def _fill(
+        self,
+        texts: List[str],
+        vectors: List[Optional[List[float]]],
+        embedded: dict[str, List[float]],
+    ) -> List[List[float]]:
+        return [vector if vector is not None else embedded[text] for text, vector in zip(texts, vectors)]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors, missing = self._misses(texts)
+        embedded = {}
+        for batch in self._batches(missing):
+            embedded.update(zip(batch, self.embeddings.embed_documents(batch)))
+        self._store(embedded)
+        return self._fill(texts, vectors, embedded)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors, missing = await asyncio.to_thread(self._misses, texts)
+
+        async def embed(batch: List[str]) -> List[List[float]]:
+            return await call_with_limits(
+                self.provider,
+                lambda: self.embeddings.aembed_documents(batch),
+                tokens=estimate_tokens(batch),
+            )
+
+        results = await asyncio.gather(*(embed(batch) for batch in self._batches(missing)))
+        embedded = {}
+        for batch, batch_vectors in zip(self._batches(missing), results):
+            embedded.update(zip(batch, batch_vectors))
+        if embedded:
+            print(f"\t Embedded {len(embedded)} of {len(texts)} texts with {self.model}")
+            await asyncio.to_thread(self._store, embedded)
+        return self._fill(texts, vectors, embedded)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.aembed_documents([text]))[0]
+
+
+embedding_cache = SQLiteCache(
+    settings.CACHE_DB_PATH,
+    "embeddings",
+    ttl_seconds=settings.EMBEDDINGS_CACHE_TTL_SECONDS,
+    max_bytes=settings.EMBEDDINGS_CACHE_MAX_BYTES,
+)
@@ -0,0 +1,125 @@
+import json
+from collections import defaultdict
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, TypeVar
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+from langchain_core.outputs import LLMResult
+from langchain_core.runnables import Runnable
+from langchain_core.tracers.context import register_configure_hook
+from pydantic import BaseModel
+
+from core.cache import SQLiteCache, hash_text
+from core.clients import get_structured_model
+from core.ratelimit import ainvoke_with_limits
+from core.settings import settings
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+def prompt_messages(instructions: str, content: Any) -> List[BaseMessage]:
+    """
+    Split a prompt into its constant instructions, sent first as the system
+    message, and the per-call content as the user message. Keeping the
+    constant part as an identical prefix lets provider prompt caches hit.
+    """
+    return [
+        SystemMessage(instructions),
+        HumanMessage(content if isinstance(content, (str, list)) else str(content)),
+    ]
+
+
+class UsageLogger(BaseCallbackHandler):
+    """Logs cached vs uncached input tokens of every model call and keeps per-model totals."""
+
+    run_inline = True
+
+    def __init__(self):
+        self.totals: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {"calls": 0, "input_tokens": 0, "cached_tokens": 0, "output_tokens": 0}
+        )
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                usage = getattr(message, "usage_metadata", None)
+                if not usage:
+                    continue
+                model = message.response_metadata.get("model_name", "unknown")
+                cached = (usage.get("input_token_details") or {}).get("cache_read") or 0
+                totals = self.totals[model]
+                totals["calls"] += 1
+                totals["input_tokens"] += usage["input_tokens"]
+                totals["cached_tokens"] += cached
+                totals["output_tokens"] += usage["output_tokens"]
+                print(
+                    f"\t {model}: {usage['input_tokens']} input tokens "
+                    f"({cached} cached, {usage['input_tokens'] - cached} uncached), "
+                    f"{usage['output_tokens']} output tokens"
+                )
+
+
+usage_logger = UsageLogger()
+
+# Attach the logger to every model run without threading callbacks through each call
+_usage_logger_var: ContextVar[Optional[UsageLogger]] = ContextVar(
+    "usage_logger", default=usage_logger if settings.LLM_USAGE_LOGGING else None
+)
+register_configure_hook(_usage_logger_var, inheritable=True)
+
+
+response_cache = SQLiteCache(
+    settings.CACHE_DB_PATH,
+    "llm_responses",
+    ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+    max_bytes=settings.LLM_CACHE_MAX_BYTES,
+)
+
+
+def _input_fingerprint(input: Any) -> str:
+    if isinstance(input, (list, tuple)):
+        return json.dumps(
+            [[message.type, message.content] if isinstance(message, BaseMessage) else message for message in input],
+            sort_keys=True,
+            default=str,
+        )
+    return str(input)
+
+
+async def ainvoke_structured(
+    provider: str,
+    schema: type[ModelT],
+    input: Any,
+    runnable: Runnable | None = None,
+    model: str | None = None,
+    temperature: float = 0,
+) -> ModelT:
+    """
+    Structured-output model call through a deterministic response cache.
+
+    Calls at temperature 0 are keyed on the provider, model, output schema and
+    prompt, so re-running an unchanged prompt returns the stored response
+    without a request. `runnable` defaults to the shared structured model for
+    `schema`; pass it when the model is bound differently (e.g. with tools).
+    """
+    runnable = runnable or get_structured_model(schema, model, temperature)
+    if not settings.LLM_CACHE_ENABLED or temperature != 0:
+        return await ainvoke_with_limits(provider, runnable, input)
+
+    key = hash_text(
+        provider,
+        model or settings.TEXT_MODEL,
+        str(temperature),
+        json.dumps(schema.model_json_schema(), sort_keys=True),
+        _input_fingerprint(input),
+    )
+    if (cached := await response_cache.aget(key)) is not None:
+        print(f"\t {schema.__name__} response cache hit ({response_cache.stats()})")
+        return schema.model_validate(cached)
+
+    response = await ainvoke_with_limits(provider, runnable, input)
+    if response is not None:
+        await response_cache.aset(key, response.model_dump(mode="json", by_alias=True))
+    return response
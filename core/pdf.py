@@ -0,0 +1,159 @@
+import asyncio
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import AsyncIterator, Iterator, List, TypedDict
+
+import fitz
+
+from core.schema import RenderOptions
+from core.settings import settings
+
+_render_pool: ProcessPoolExecutor | None = None
+
+
+class PageStats(TypedDict):
+    text_chars: int
+    image_count: int
+    image_area_ratio: float
+    drawing_count: int
+
+
+class RenderedPage(TypedDict):
+    image: bytes
+    text: List[str]
+    stats: PageStats
+    fingerprint: str
+
+
+def _get_render_pool() -> ProcessPoolExecutor:
+    """Process-wide pool used to rasterize PDF pages off the event loop."""
+    global _render_pool
+    if _render_pool is None:
+        _render_pool = ProcessPoolExecutor(
+            max_workers=settings.PDF_RENDER_WORKERS or os.cpu_count(),
+            # MuPDF is not fork-safe once the server has started its own threads
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _render_pool
+
+
+def _extract_text_layer(page: fitz.Page) -> tuple[List[str], PageStats]:
+    """Pull the page's text lines and an inventory of its images and vector drawings."""
+    page_area = abs(page.rect) or 1.0
+    lines: List[str] = []
+    image_count = 0
+    image_area = 0.0
+    for block in page.get_text("dict")["blocks"]:
+        if block["type"] == 1:
+            image_count += 1
+            image_area += abs(fitz.Rect(block["bbox"]) & page.rect)
+            continue
+        for line in block.get("lines", []):
+            text = "".join(span["text"] for span in line["spans"]).strip()
+            if text:
+                lines.append(text)
+
+    stats: PageStats = {
+        "text_chars": sum(len(line) for line in lines),
+        "image_count": image_count,
+        "image_area_ratio": min(1.0, image_area / page_area),
+        "drawing_count": len(page.get_drawings()),
+    }
+    return lines, stats
+
+
+def _fingerprint(page: fitz.Page) -> str:
+    """64-bit difference hash of a 9x8 grayscale thumbnail, for spotting near-identical pages."""
+    pix = page.get_pixmap(
+        matrix=fitz.Matrix(9 / page.rect.width, 8 / page.rect.height),
+        colorspace=fitz.csGRAY,
+        alpha=False,
+    )
+    samples = pix.samples
+    value = 0
+    for y in range(min(pix.height, 8)):
+        row = y * pix.stride
+        for x in range(min(pix.width - 1, 8)):
+            value = value << 1 | (samples[row + x] > samples[row + x + 1])
+    return f"{value:016x}"
+
+
+def _render_page(page: fitz.Page, options: RenderOptions) -> RenderedPage:
+    """Rasterize a page, encoding it straight from the pixmap, and extract its text layer."""
+    zoom = options.dpi / 72
+    if options.max_edge:
+        zoom = min(zoom, options.max_edge / max(page.rect.width, page.rect.height))
+
+    pix = page.get_pixmap(
+        matrix=fitz.Matrix(zoom, zoom),
+        colorspace=fitz.csGRAY if options.grayscale else fitz.csRGB,
+        alpha=False,
+    )
+    if options.format == "jpeg":
+        image = pix.tobytes(output="jpeg", jpg_quality=options.quality)
+    else:
+        image = pix.tobytes(output="png")
+
+    text, stats = _extract_text_layer(page)
+    return {"image": image, "text": text, "stats": stats, "fingerprint": _fingerprint(page)}
+
+
+def _render_page_from_file(pdf_path: str, page_num: int, options: RenderOptions) -> RenderedPage:
+    """Render a single page in a pool worker; the PDF is shared by path, not pickled."""
+    with fitz.open(pdf_path) as pdf_document:
+        return _render_page(pdf_document.load_page(page_num), options)
+
+
+def count_pdf_pages(pdf_bytes) -> int:
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as pdf_document:
+        return len(pdf_document)
+
+
+def convert_pdf_to_images(pdf_bytes, options: RenderOptions | None = None) -> Iterator[RenderedPage]:
+    """Lazily render every page of a PDF, yielding one encoded image and text layer per page in order."""
+    options = options or RenderOptions()
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as pdf_document:
+        for page_num in range(len(pdf_document)):
+            yield _render_page(pdf_document.load_page(page_num), options)
+
+
+async def iter_pdf_images(pdf_bytes, options: RenderOptions | None = None) -> AsyncIterator[RenderedPage]:
+    """
+    Render the pages of a PDF in the process pool and yield them in page order.
+
+    All pages are submitted up front, so page 1 is yielded as soon as it is ready
+    while later pages are still being rasterized.
+    """
+    options = options or RenderOptions()
+    loop = asyncio.get_running_loop()
+    fd, pdf_path = tempfile.mkstemp(suffix=".pdf")
+    futures = []
+    try:
+        with os.fdopen(fd, "wb") as tmp:
+            tmp.write(pdf_bytes)
+
+        with fitz.open(pdf_path) as pdf_document:
+            page_count = len(pdf_document)
+
+        pool = _get_render_pool()
+        futures = [
+            loop.run_in_executor(pool, _render_page_from_file, pdf_path, page_num, options)
+            for page_num in range(page_count)
+        ]
+        for future in futures:
+            yield await future
+    finally:
+        for future in futures:
+            future.cancel()
+        # Cancelled-but-running renders still hold the file open; wait for them
+        await asyncio.gather(*futures, return_exceptions=True)
+        os.remove(pdf_path)
+
+
+def shutdown_render_pool() -> None:
+    global _render_pool
+    if _render_pool is not None:
+        _render_pool.shutdown(cancel_futures=True)
+        _render_pool = None
@@ -17,6 +17,14 @@ Given the image of a presentation slide (typically from a PDF), extract and retu
 If any of the elements (text, figures, images) are not present in the slide, return an empty array for that field.
 """
 
+SLIDES_BATCH_TO_TEXT_PROMPT = SLIDE_TO_TEXT_PROMPT + """
+You are given several slide images, in slide order; the user message states how many. Apply the
+instructions above to each slide separately and return a `slides` list with exactly one entry per
+image, in the same order. Never merge content from different slides into one entry.
+"""
+
+SLIDES_BATCH_COUNT_PROMPT = "There are {count} slide images. Return exactly {count} entries."
+
 SUMMARIZE_COMPANY_OVERVIEW_PROMPT = """
 You are a highly skilled startup analyst helping investors quickly understand early-stage companies from their pitch decks.
 
@@ -363,3 +371,9 @@ Only return the final JSON array and nothing else.
 Following is the markdown content of the GitHub project page:
 """
 
+
+SCORING_CATEGORY_PROMPT = """
+
+The pitch information above is limited to the sections relevant to **{category}**.
+Rate only the **{category}** category and return exactly one score, for {category}.
+"""
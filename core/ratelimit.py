@@ -0,0 +1,268 @@
+import asyncio
+import random
+import re
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, Optional, Tuple, Type, TypeVar
+
+from core.settings import settings
+
+T = TypeVar("T")
+
+
+@lru_cache(maxsize=None)
+def retryable_errors() -> Tuple[Type[BaseException], ...]:
+    """Transient provider errors worth retrying; the SDKs are imported on first use."""
+    import openai
+    from google.api_core import exceptions as google_exceptions
+
+    return (
+        openai.RateLimitError,
+        openai.APITimeoutError,
+        openai.APIConnectionError,
+        openai.InternalServerError,
+        google_exceptions.ResourceExhausted,
+        google_exceptions.ServiceUnavailable,
+        google_exceptions.DeadlineExceeded,
+        google_exceptions.InternalServerError,
+    )
+
+
+@lru_cache(maxsize=None)
+def rate_limit_errors() -> Tuple[Type[BaseException], ...]:
+    import openai
+    from google.api_core import exceptions as google_exceptions
+
+    return (openai.RateLimitError, google_exceptions.ResourceExhausted)
+
+
+# Gemini bills a fixed number of input tokens per image
+IMAGE_TOKEN_ESTIMATE = 258
+
+# Identifies the API request a provider call is made for, so that concurrency
+# slots are shared fairly between requests instead of first come, first served
+current_request: ContextVar[Optional[Hashable]] = ContextVar("current_request", default=None)
+
+
+class TokenBucket:
+    """Continuously refilling bucket holding at most one minute's budget."""
+
+    def __init__(self, per_minute: Optional[float]):
+        self.capacity = per_minute
+        self.available = per_minute or 0.0
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        if self.capacity:
+            elapsed = now - self.updated
+            self.available = min(self.capacity, self.available + elapsed * self.capacity / 60)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        if not self.capacity:
+            return 0.0
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        return max(0.0, (amount - self.available) * 60 / self.capacity)
+
+    def consume(self, amount: float) -> None:
+        if self.capacity:
+            self.available -= min(amount, self.capacity)
+
+
+class ProviderLimiter:
+    """
+    Request/token budget and adaptive concurrency limit for one provider.
+
+    Calls first wait for a concurrency slot, then for room in the
+    requests-per-minute and tokens-per-minute buckets. Slots are handed out
+    round-robin across requests (see `current_request`), so one large deck
+    cannot starve the others. The concurrency limit is halved on every
+    rate-limit error and grows back additively on success, and a Retry-After
+    from the provider pauses all calls to it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rpm: Optional[float] = None,
+        tpm: Optional[float] = None,
+        max_concurrency: int = 16,
+    ):
+        self.name = name
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.max_concurrency = max_concurrency
+        self.concurrency = float(max_concurrency)
+        self.in_flight = 0
+        self._paused_until = 0.0
+        self._budget_lock = asyncio.Lock()
+        self._waiting: OrderedDict[Optional[Hashable], Deque[asyncio.Future]] = OrderedDict()
+
+    async def _wait_for_budget(self, tokens: int) -> None:
+        async with self._budget_lock:
+            while True:
+                now = time.monotonic()
+                delay = max(
+                    self._paused_until - now,
+                    self.requests.wait_time(1, now),
+                    self.tokens.wait_time(tokens, now),
+                )
+                if delay <= 0:
+                    self.requests.consume(1)
+                    self.tokens.consume(tokens)
+                    return
+                await asyncio.sleep(delay)
+
+    def _has_capacity(self) -> bool:
+        return self.in_flight < max(1, int(self.concurrency))
+
+    def _grant(self) -> None:
+        """Hand free slots to waiting calls, one request at a time in turn."""
+        while self._waiting and self._has_capacity():
+            request, queue = next(iter(self._waiting.items()))
+            waiter = queue.popleft()
+            if queue:
+                self._waiting.move_to_end(request)
+            else:
+                del self._waiting[request]
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    async def _acquire_slot(self) -> None:
+        if not self._waiting and self._has_capacity():
+            self.in_flight += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiting.setdefault(current_request.get(), deque()).append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self._release_slot()
+            raise
+
+    def _release_slot(self) -> None:
+        self.in_flight -= 1
+        self._grant()
+
+    @asynccontextmanager
+    async def slot(self, tokens: int = 0):
+        await self._acquire_slot()
+        try:
+            await self._wait_for_budget(tokens)
+            yield
+        finally:
+            self._release_slot()
+
+    def pause(self, seconds: float) -> None:
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def on_success(self) -> None:
+        self.concurrency = min(self.max_concurrency, self.concurrency + 1 / self.concurrency)
+        self._grant()
+
+    def on_rate_limited(self) -> None:
+        self.concurrency = max(1.0, self.concurrency / 2)
+
+
+_limiters: Dict[str, ProviderLimiter] = {}
+
+
+def get_limiter(provider: str) -> ProviderLimiter:
+    if provider not in _limiters:
+        prefix = provider.upper()
+        _limiters[provider] = ProviderLimiter(
+            provider,
+            rpm=getattr(settings, f"{prefix}_RPM"),
+            tpm=getattr(settings, f"{prefix}_TPM"),
+            max_concurrency=getattr(settings, f"{prefix}_MAX_CONCURRENCY"),
+        )
+    return _limiters[provider]
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Delay requested by the provider, from Retry-After headers or Google's RetryInfo."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            value = headers["retry-after"]
+            try:
+                return float(value)
+            except ValueError:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        pass
+    match = re.search(r"retry_delay\s*\{\s*seconds:\s*(\d+)", str(error))
+    if match:
+        return float(match.group(1))
+    return None
+
+
+def backoff_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter."""
+    ceiling = min(settings.LLM_BACKOFF_MAX, settings.LLM_BACKOFF_BASE * 2 ** attempt)
+    return random.uniform(0, ceiling)
+
+
+def estimate_tokens(value: Any) -> int:
+    """Rough input token count of a prompt, message list or multimodal content."""
+    if isinstance(value, str):
+        return len(value) // 4 + 1
+    if isinstance(value, dict):
+        if value.get("type") == "image_url":
+            return IMAGE_TOKEN_ESTIMATE
+        return sum(estimate_tokens(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(estimate_tokens(item) for item in value)
+    content = getattr(value, "content", None)
+    if content is not None:
+        return estimate_tokens(content)
+    return 0
+
+
+async def call_with_limits(
+    provider: str,
+    call: Callable[[], Awaitable[T]],
+    tokens: int = 0,
+) -> T:
+    """
+    Run a provider call within its rate limits, retrying transient failures
+    with jittered exponential backoff or the delay the provider asked for.
+    """
+    limiter = get_limiter(provider)
+    for attempt in range(settings.LLM_MAX_RETRIES + 1):
+        async with limiter.slot(tokens):
+            try:
+                result = await call()
+            except retryable_errors() as e:
+                if attempt == settings.LLM_MAX_RETRIES:
+                    raise
+                requested = retry_after(e)
+                if isinstance(e, rate_limit_errors()):
+                    limiter.on_rate_limited()
+                    if requested:
+                        limiter.pause(requested)
+                delay = requested if requested is not None else backoff_delay(attempt)
+                print(f"{provider} call failed ({type(e).__name__}), retrying in {delay:.1f}s")
+            else:
+                limiter.on_success()
+                return result
+        await asyncio.sleep(delay)
+    raise RuntimeError("unreachable")
+
+
+async def ainvoke_with_limits(provider: str, runnable, input: Any, **kwargs: Any) -> Any:
+    """`runnable.ainvoke(input)` under the provider's rate limits and retry policy."""
+    return await call_with_limits(
+        provider,
+        lambda: runnable.ainvoke(input, **kwargs),
+        tokens=estimate_tokens(input),
+    )
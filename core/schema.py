@@ -22,12 +22,59 @@ class UserInput(BaseModel):
         default=None,
         examples=["847c6285-8fc9-4560-a83f-4e6285809254"],
     )
+    deck_id: str | None = Field(
+        description="Deck to answer questions about, as returned by the analysis endpoints. "
+        "Binds the thread to the deck; later messages in the thread may omit it.",
+        default=None,
+        examples=["3f1c9e0b2a7d4c5e8f6a1b2c3d4e5f60"],
+    )
     agent_config: dict[str, Any] = Field(
-        description="Additional configuration to pass through to the agent",
+        description="Additional configuration to pass through to the agent, "
+        "e.g. `retrieval_k` or `retrieval_search` (similarity, hybrid, mmr or threshold)",
         default={},
         examples=[{"spicy_level": 0.8}],
     )
 
+class StreamInput(UserInput):
+    """User input for streaming the agent's response."""
+
+    stream_tokens: bool = Field(
+        description="Whether to stream LLM tokens to the client.",
+        default=True,
+    )
+
+class RenderOptions(BaseModel):
+    """Options controlling how PDF pages are rasterized and encoded."""
+
+    dpi: int = Field(
+        description="Rendering resolution in dots per inch.",
+        default=settings.PDF_RENDER_DPI,
+        gt=0,
+    )
+    format: Literal["png", "jpeg"] = Field(
+        description="Encoding of the rendered page.",
+        default=settings.PDF_IMAGE_FORMAT,
+    )
+    quality: int = Field(
+        description="JPEG quality; ignored for PNG.",
+        default=settings.PDF_IMAGE_QUALITY,
+        ge=1,
+        le=100,
+    )
+    max_edge: int | None = Field(
+        description="Upper bound in pixels for the longer side of the page; lowers the DPI if exceeded.",
+        default=settings.PDF_MAX_EDGE,
+        gt=0,
+    )
+    grayscale: bool = Field(
+        description="Render pages in grayscale instead of RGB.",
+        default=settings.PDF_GRAYSCALE,
+    )
+
+    @property
+    def mime_type(self) -> str:
+        return f"image/{self.format}"
+
 class ToolCall(TypedDict):
     """Represents a request to call a tool."""
 
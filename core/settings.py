@@ -1,4 +1,4 @@
-from typing import Annotated
+from typing import Annotated, Literal
 from dotenv import find_dotenv
 from pydantic import (
     BeforeValidator,
@@ -35,6 +35,11 @@ class Settings(BaseSettings):
     TEXT_MODEL: str | None = None
     VISION_MODEL: str | None = None
     EMBEDDINGS_MODEL: str | None = None
+    EMBEDDINGS_BATCH_SIZE: int = 2048
+    EMBEDDINGS_CACHE_ENABLED: bool = True
+    EMBEDDINGS_MEMORY_CACHE_SIZE: int = 4096
+    EMBEDDINGS_CACHE_TTL_SECONDS: int | None = 30 * 24 * 60 * 60
+    EMBEDDINGS_CACHE_MAX_BYTES: int | None = 512 * 1024 * 1024
 
     LANGCHAIN_TRACING_V2: bool = False
     LANGCHAIN_PROJECT: str = "default"
@@ -45,5 +50,71 @@ class Settings(BaseSettings):
 
     ELASTIC_SEARCH_URL: str | None = None
     ELASTIC_SEARCH_API: str | None = None
+    VECTOR_INDEX_NAME: str = "pitch-deck-ai"
+    VECTOR_BACKEND: Literal["elasticsearch", "local"] = "elasticsearch"
+    LOCAL_VECTOR_PATH: str = ".cache/vectors"
+    QA_RETRIEVAL_K: int = 6
+    QA_RETRIEVAL_SEARCH: Literal["similarity", "hybrid", "mmr", "threshold"] = "hybrid"
+    QA_RETRIEVAL_FETCH_K: int = 20
+    QA_RETRIEVAL_MMR_LAMBDA: float = 0.5
+    QA_RETRIEVAL_SCORE_THRESHOLD: float = 0.75
+    QA_RETRIEVAL_RRF_K: int = 60
+
+    WARM_UP_ON_STARTUP: bool = False
+
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 60.0
+    HTTP_TIMEOUT: float = 120.0
+
+    OPENAI_RPM: float | None = None
+    OPENAI_TPM: float | None = None
+    OPENAI_MAX_CONCURRENCY: int = 32
+    GEMINI_RPM: float | None = None
+    GEMINI_TPM: float | None = None
+    GEMINI_MAX_CONCURRENCY: int = 16
+    LLM_USAGE_LOGGING: bool = True
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_TTL_SECONDS: int | None = 30 * 24 * 60 * 60
+    LLM_CACHE_MAX_BYTES: int | None = 256 * 1024 * 1024
+    LLM_MAX_RETRIES: int = 5
+    LLM_BACKOFF_BASE: float = 1.0
+    LLM_BACKOFF_MAX: float = 60.0
+
+    PDF_RENDER_WORKERS: int | None = None
+    PDF_RENDER_DPI: int = 72
+    PDF_IMAGE_FORMAT: Literal["png", "jpeg"] = "jpeg"
+    PDF_IMAGE_QUALITY: int = 80
+    PDF_MAX_EDGE: int | None = None
+    PDF_GRAYSCALE: bool = False
+
+    CACHE_DB_PATH: str = ".cache/deck-insight.sqlite3"
+    DECK_CACHE_ENABLED: bool = True
+    DECK_CACHE_TTL_SECONDS: int | None = 7 * 24 * 60 * 60
+    DECK_CACHE_MAX_ENTRIES: int | None = 500
+    SLIDE_CACHE_ENABLED: bool = True
+    SLIDE_CACHE_TTL_SECONDS: int | None = 30 * 24 * 60 * 60
+    SLIDE_CACHE_MAX_ENTRIES: int | None = 20000
+    BLOB_STORE_PATH: str = ".cache/blobs"
+    BLOB_MEMORY_MAX_BYTES: int = 256 * 1024 * 1024
+    BLOB_STORE_TTL_SECONDS: int | None = 7 * 24 * 60 * 60
+
+    OCR_BATCH_SIZE: int = 1
+    TEXT_LAYER_ENABLED: bool = True
+    TEXT_LAYER_MIN_CHARS: int = 40
+    TEXT_LAYER_MAX_IMAGE_RATIO: float = 0.15
+    TEXT_LAYER_MAX_DRAWINGS: int = 25
+    DEDUP_SLIDES_ENABLED: bool = True
+    DEDUP_MAX_HASH_DISTANCE: int = 6
+    SUMMARY_CONTEXT_ROUTING: bool = True
+    SUMMARY_CONTEXT_MAX_TOKENS: int | None = 6000
+    PIPELINE_OVERVIEW_SLIDES: int = 0
+    PIPELINE_SCORE_PER_CATEGORY: bool = True
+
+    CHECKPOINTER: Literal["memory", "sqlite", "none"] = "memory"
+    CHECKPOINT_DB_PATH: str = ".cache/checkpoints.sqlite3"
+    CHECKPOINT_MAX_THREADS: int | None = 1000
+    CHECKPOINT_TTL_SECONDS: int | None = 24 * 60 * 60
+    CHECKPOINT_ONE_SHOT_GRAPHS: bool = False
 
 settings = Settings()
@@ -1,10 +1,10 @@
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 from typing import Any
 from uuid import UUID, uuid4
 from langchain_core.runnables import RunnableConfig
-import fitz
-from PIL import Image
-import io
-import base64
+import hashlib
 from langchain_core.messages import (
     AIMessage,
     BaseMessage,
@@ -15,11 +15,15 @@ from langchain_core.messages import (
     ChatMessage as LangchainChatMessage,
 )
 from langgraph.types import Command
-from core.schema import ChatMessage, UserInput
+from core.schema import ChatMessage, RenderOptions, UserInput
+from core.pdf import RenderedPage, count_pdf_pages, iter_pdf_images
+from core.blobs import blob_store
 from fastapi import HTTPException
 from langgraph.pregel import Pregel
 
-async def handle_complete(user_input: list) -> tuple[dict[str, Any], UUID]:
+async def handle_complete(
+    user_input: list, deck_id: str | None = None, slide_feed: str | None = None
+) -> tuple[dict[str, Any], UUID]:
     run_id = uuid4()
     thread_id = str(uuid4())
 
@@ -31,7 +35,9 @@ async def handle_complete(user_input: list) -> tuple[dict[str, Any], UUID]:
     )
 
     initial_state = {
+        "deck_id": deck_id,
         "slides": user_input,
+        "slide_feed": slide_feed,
         "summary": None,
         "scorecard": None,
         "slide_content": None,
@@ -53,7 +59,9 @@ async def handle_complete(user_input: list) -> tuple[dict[str, Any], UUID]:
     return kwargs, run_id
 
 
-async def handle_input_slides(user_input: list) -> tuple[dict[str, Any], UUID]:
+async def handle_input_slides(
+    user_input: list, deck_id: str | None = None, slide_feed: str | None = None
+) -> tuple[dict[str, Any], UUID]:
     run_id = uuid4()
     thread_id = str(uuid4())
 
@@ -65,7 +73,9 @@ async def handle_input_slides(user_input: list) -> tuple[dict[str, Any], UUID]:
     )
 
     initial_state = {
+        "deck_id": deck_id,
         "slides": user_input,
+        "slide_feed": slide_feed,
         "current_index": 0,
         "scorecard": None
     }
@@ -112,6 +122,8 @@ async def handle_qa_input(user_input: UserInput, agent: Pregel) -> tuple[dict[st
         input = Command(resume=user_input.message)
     else:
         input = {"messages": [HumanMessage(content=user_input.message)]}
+        if user_input.deck_id:
+            input["deck_id"] = user_input.deck_id
 
     kwargs = {
         "input": input,
@@ -166,24 +178,73 @@ async def handle_github_link(link: str) -> tuple[dict[str, Any], UUID]:
     return kwargs, run_id
 
 
-def convert_pdf_to_images(pdf_bytes):
-    pdf_document = fitz.open(stream=pdf_bytes, filetype="pdf")
-    images = []
+def make_deck_id(pdf_bytes: bytes) -> str:
+    """Stable id of a deck, derived from the PDF contents so re-uploads index idempotently."""
+    return hashlib.sha256(pdf_bytes).hexdigest()[:32]
 
-    for page_num in range(len(pdf_document)):
-        page = pdf_document.load_page(page_num)
-        pix = page.get_pixmap()
+async def slide_record(page: RenderedPage, render_options: RenderOptions) -> dict[str, Any]:
+    """
+    The slide record the pitch deck graphs take as input for a rendered page.
+    The image goes to the blob store; the slide only carries a reference to it.
+    """
+    return {
+        'imageRef': await blob_store.aput(page["image"]),
+        'mimeType': render_options.mime_type,
+        'textLayer': page["text"],
+        'pageStats': page["stats"],
+        'fingerprint': page["fingerprint"],
+    }
 
-        img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-        byte_arr = io.BytesIO()
-        img.save(byte_arr, format='PNG')
-        images.append(byte_arr)
 
-    pdf_document.close()
-    return images
+class SlideFeed:
+    """
+    Slides of a PDF rendered in the background and handed out in page order
+    as each one is ready, so the analysis of the first slides overlaps the
+    rendering of the rest. Graph state refers to a feed by its `id`.
+    """
 
-def getbase64(image):
-    return "data:image/jpeg;base64," + base64.b64encode(image.getvalue()).decode("utf-8")
+    def __init__(self, pdf_bytes: bytes, render_options: RenderOptions):
+        self.id = str(uuid4())
+        self.total = count_pdf_pages(pdf_bytes)
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._render(pdf_bytes, render_options))
+
+    async def _render(self, pdf_bytes: bytes, render_options: RenderOptions) -> None:
+        try:
+            async for page in iter_pdf_images(pdf_bytes, render_options):
+                await self._queue.put(await slide_record(page, render_options))
+        except Exception as e:
+            await self._queue.put(e)
+        else:
+            await self._queue.put(None)
+
+    async def __aiter__(self) -> AsyncIterator[dict[str, Any]]:
+        while (item := await self._queue.get()) is not None:
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    def close(self) -> None:
+        """Stop rendering pages nobody will read."""
+        self._task.cancel()
+
+
+# Feeds of the analyses in flight, by id
+_slide_feeds: dict[str, SlideFeed] = {}
+
+@asynccontextmanager
+async def open_slide_feed(pdf_bytes: bytes, render_options: RenderOptions) -> AsyncIterator[SlideFeed]:
+    """Start rendering a PDF; the feed can be looked up by id until the block exits."""
+    feed = SlideFeed(pdf_bytes, render_options)
+    _slide_feeds[feed.id] = feed
+    try:
+        yield feed
+    finally:
+        _slide_feeds.pop(feed.id, None)
+        feed.close()
+
+def get_slide_feed(feed_id: str) -> SlideFeed | None:
+    return _slide_feeds.get(feed_id)
 
 
 def convert_message_content_to_string(content: str | list[str | dict]) -> str:
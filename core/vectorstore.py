@@ -0,0 +1,313 @@
+import asyncio
+import json
+import math
+import os
+import re
+import threading
+import uuid
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+from langchain_core.vectorstores.utils import maximal_marginal_relevance
+
+
+def tokenize(text: str) -> List[str]:
+    return re.findall(r"\w+", text.lower())
+
+
+class LocalVectorStore(VectorStore):
+    """
+    Embedded vector index: a matrix of unit-normalized embeddings searched by
+    exact cosine top-k, persisted under `path` as a memory-mapped vectors file
+    and a `documents.json` with the ids, texts and metadata that names it.
+
+    `keyword_search` ranks the same documents lexically with BM25.
+    Documents are upserted by id. `filter` is a dict of metadata values that
+    must match exactly. Scores are mapped to [0, 1] like Elasticsearch's
+    cosine similarity, so score thresholds mean the same on both backends.
+    """
+
+    def __init__(self, path: str, embedding: Embeddings):
+        self.path = path
+        self.embedding = embedding
+        self._lock = threading.Lock()
+        self._vectors: Optional[np.ndarray] = None
+        self._documents: List[Dict[str, Any]] = []
+        self._rows: Dict[str, int] = {}
+        self._columns: Dict[str, np.ndarray] = {}
+        self._terms: Dict[int, Counter] = {}
+        self._loaded_version: Optional[Tuple[int, int]] = None
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.embedding
+
+    @property
+    def _documents_file(self) -> str:
+        return os.path.join(self.path, "documents.json")
+
+    def _load(self) -> None:
+        """(Re)load the index if it was written since, e.g. by another store on the same path."""
+        while True:
+            try:
+                stat = os.stat(self._documents_file)
+            except FileNotFoundError:
+                return
+            # A rewrite replaces the file, so the inode changes even within the mtime resolution
+            version = (stat.st_ino, stat.st_mtime_ns)
+            if version == self._loaded_version:
+                return
+            with open(self._documents_file, encoding="utf-8") as f:
+                index = json.load(f)
+            try:
+                vectors = np.load(os.path.join(self.path, index["vectors"]), mmap_mode="r")
+            except FileNotFoundError:
+                # Superseded by a newer write while reading; pick that one up
+                continue
+            if vectors.shape[0] != len(index["documents"]):
+                raise ValueError(
+                    f"Index {self.path} is inconsistent: {len(index['documents'])} documents, "
+                    f"{vectors.shape[0]} vectors"
+                )
+            self._vectors = vectors
+            self._documents = index["documents"]
+            self._rows = {document["id"]: row for row, document in enumerate(self._documents)}
+            self._columns.clear()
+            self._terms.clear()
+            self._loaded_version = version
+            return
+
+    def _persist(self, vectors: np.ndarray) -> None:
+        """
+        Write the vectors under a new name, then swap in the documents file that
+        points at them, so a reader always gets vectors and documents of the same write.
+        """
+        os.makedirs(self.path, exist_ok=True)
+        vectors_name = f"vectors-{uuid.uuid4().hex}.npy"
+        with open(os.path.join(self.path, f"{vectors_name}.tmp"), "wb") as f:
+            np.save(f, vectors)
+        os.replace(os.path.join(self.path, f"{vectors_name}.tmp"), os.path.join(self.path, vectors_name))
+        previous = None
+        if os.path.exists(self._documents_file):
+            with open(self._documents_file, encoding="utf-8") as f:
+                previous = json.load(f)["vectors"]
+        with open(f"{self._documents_file}.tmp", "w", encoding="utf-8") as f:
+            json.dump({"vectors": vectors_name, "documents": self._documents}, f, ensure_ascii=False)
+        os.replace(f"{self._documents_file}.tmp", self._documents_file)
+        # Keep the previous vectors for readers that have just read the old documents file
+        for name in os.listdir(self.path):
+            if name.startswith("vectors-") and name.endswith(".npy") and name not in (vectors_name, previous):
+                try:
+                    os.remove(os.path.join(self.path, name))
+                except OSError:
+                    pass
+        self._loaded_version = None
+        self._load()
+
+    def _upsert(
+        self,
+        ids: List[str],
+        texts: List[str],
+        metadatas: List[Dict[str, Any]],
+        embeddings: List[List[float]],
+    ) -> None:
+        new = np.asarray(embeddings, dtype=np.float32)
+        new /= np.maximum(np.linalg.norm(new, axis=1, keepdims=True), 1e-12)
+        with self._lock:
+            self._load()
+            if self._vectors is not None and self._vectors.shape[1] != new.shape[1]:
+                raise ValueError(
+                    f"Index {self.path} holds {self._vectors.shape[1]}-dimensional embeddings, got "
+                    f"{new.shape[1]}; it was built with a different embedding model"
+                )
+            vectors = np.array(self._vectors) if self._vectors is not None else np.empty((0, new.shape[1]), np.float32)
+            appended = []
+            for i, id in enumerate(ids):
+                document = {"id": id, "text": texts[i], "metadata": metadatas[i]}
+                if id in self._rows:
+                    vectors[self._rows[id]] = new[i]
+                    self._documents[self._rows[id]] = document
+                else:
+                    self._rows[id] = len(self._documents)
+                    self._documents.append(document)
+                    appended.append(new[i])
+            if appended:
+                vectors = np.vstack([vectors, np.stack(appended)])
+            self._columns.clear()
+            self._terms.clear()
+            self._persist(vectors)
+
+    def _column(self, key: str) -> np.ndarray:
+        if key not in self._columns:
+            self._columns[key] = np.array(
+                [document["metadata"].get(key) for document in self._documents], dtype=object
+            )
+        return self._columns[key]
+
+    def _filtered_rows(self, filter: Optional[Dict[str, Any]]) -> np.ndarray:
+        rows = np.arange(len(self._documents))
+        for key, value in (filter or {}).items():
+            rows = rows[self._column(key)[rows] == value]
+        return rows
+
+    def _search(
+        self, query_embedding: List[float], k: int, filter: Optional[Dict[str, Any]] = None
+    ) -> List[Tuple[int, float]]:
+        """Top-k (row, cosine similarity) pairs among the rows matching `filter`."""
+        with self._lock:
+            self._load()
+            if self._vectors is None or not len(self._documents):
+                return []
+            rows = self._filtered_rows(filter)
+            if not len(rows):
+                return []
+            query = np.asarray(query_embedding, dtype=np.float32)
+            query /= max(float(np.linalg.norm(query)), 1e-12)
+            similarities = self._vectors[rows] @ query
+        top = np.argsort(-similarities)[:k]
+        return [(int(rows[i]), float(similarities[i])) for i in top]
+
+    def _row_terms(self, row: int) -> Counter:
+        if row not in self._terms:
+            self._terms[row] = Counter(tokenize(self._documents[row]["text"]))
+        return self._terms[row]
+
+    def keyword_search(
+        self,
+        query: str,
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        k1: float = 1.2,
+        b: float = 0.75,
+    ) -> List[Document]:
+        """
+        BM25 ranking of the rows matching `filter`. Statistics are computed
+        over those rows only, which is cheap at the size of one deck.
+        """
+        query_terms = set(tokenize(query))
+        with self._lock:
+            self._load()
+            rows = self._filtered_rows(filter) if self._documents else []
+            terms = [self._row_terms(int(row)) for row in rows]
+        if not query_terms or not terms:
+            return []
+        lengths = [sum(counts.values()) for counts in terms]
+        average_length = max(sum(lengths) / len(lengths), 1)
+        frequencies = {term: sum(1 for counts in terms if term in counts) for term in query_terms}
+        scores = []
+        for row, counts, length in zip(rows, terms, lengths):
+            score = 0.0
+            for term in query_terms:
+                if not counts[term]:
+                    continue
+                idf = math.log(1 + (len(terms) - frequencies[term] + 0.5) / (frequencies[term] + 0.5))
+                score += idf * counts[term] * (k1 + 1) / (counts[term] + k1 * (1 - b + b * length / average_length))
+            if score > 0:
+                scores.append((score, int(row)))
+        scores.sort(reverse=True)
+        return [self._document(row) for _, row in scores[:k]]
+
+    async def akeyword_search(
+        self, query: str, k: int = 4, filter: Optional[Dict[str, Any]] = None
+    ) -> List[Document]:
+        return await asyncio.to_thread(self.keyword_search, query, k, filter)
+
+    def _document(self, row: int) -> Document:
+        document = self._documents[row]
+        return Document(document["text"], id=document["id"], metadata=document["metadata"])
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        ids = ids or [str(uuid.uuid4()) for _ in texts]
+        self._upsert(ids, texts, metadatas or [{} for _ in texts], self.embedding.embed_documents(texts))
+        return ids
+
+    async def aadd_documents(self, documents: List[Document], ids: Optional[List[str]] = None, **kwargs: Any) -> List[str]:
+        texts = [document.page_content for document in documents]
+        ids = ids or [document.id or str(uuid.uuid4()) for document in documents]
+        embeddings = await self.embedding.aembed_documents(texts)
+        await asyncio.to_thread(
+            self._upsert, ids, texts, [dict(document.metadata) for document in documents], embeddings
+        )
+        return ids
+
+    def _scored(self, hits: List[Tuple[int, float]]) -> List[Tuple[Document, float]]:
+        return [(self._document(row), (1 + similarity) / 2) for row, similarity in hits]
+
+    def similarity_search_with_score(
+        self, query: str, k: int = 4, filter: Optional[Dict[str, Any]] = None, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        return self._scored(self._search(self.embedding.embed_query(query), k, filter))
+
+    async def asimilarity_search_with_score(
+        self, query: str, k: int = 4, filter: Optional[Dict[str, Any]] = None, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        query_embedding = await self.embedding.aembed_query(query)
+        return self._scored(self._search(query_embedding, k, filter))
+
+    def similarity_search(
+        self, query: str, k: int = 4, filter: Optional[Dict[str, Any]] = None, **kwargs: Any
+    ) -> List[Document]:
+        return [document for document, _ in self.similarity_search_with_score(query, k, filter)]
+
+    async def asimilarity_search(
+        self, query: str, k: int = 4, filter: Optional[Dict[str, Any]] = None, **kwargs: Any
+    ) -> List[Document]:
+        return [document for document, _ in await self.asimilarity_search_with_score(query, k, filter)]
+
+    def _mmr(
+        self, query_embedding: List[float], k: int, fetch_k: int, lambda_mult: float, filter: Optional[Dict[str, Any]]
+    ) -> List[Document]:
+        rows = [row for row, _ in self._search(query_embedding, fetch_k, filter)]
+        if not rows:
+            return []
+        selected = maximal_marginal_relevance(
+            np.asarray(query_embedding, dtype=np.float32), np.asarray(self._vectors[rows]), lambda_mult=lambda_mult, k=k
+        )
+        return [self._document(rows[i]) for i in selected]
+
+    def max_marginal_relevance_search(
+        self,
+        query: str,
+        k: int = 4,
+        fetch_k: int = 20,
+        lambda_mult: float = 0.5,
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> List[Document]:
+        return self._mmr(self.embedding.embed_query(query), k, fetch_k, lambda_mult, filter)
+
+    async def amax_marginal_relevance_search(
+        self,
+        query: str,
+        k: int = 4,
+        fetch_k: int = 20,
+        lambda_mult: float = 0.5,
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> List[Document]:
+        return self._mmr(await self.embedding.aembed_query(query), k, fetch_k, lambda_mult, filter)
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        path: str = ".cache/vectors/default",
+        **kwargs: Any,
+    ) -> "LocalVectorStore":
+        store = cls(path, embedding)
+        store.add_texts(texts, metadatas, ids)
+        return store
@@ -1,45 +1,68 @@
+import json
 import logging
 import warnings
-from typing import Any, Dict
+from collections.abc import AsyncGenerator
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict
+from uuid import UUID, uuid4
 
-from fastapi import APIRouter, FastAPI, HTTPException
+from fastapi import APIRouter, FastAPI, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from langchain_core._api import LangChainBetaWarning
 from langgraph.graph.state import CompiledStateGraph
-from fastapi import UploadFile, File
-from agents.pitch_deck.agent import pitch_deck_agent
-from agents.market_size.agent import market_research_agent
-from agents.github_repo.agent import github_repo_agent
-from agents.chatbot_qa.agent import qa_agent
-from agents.supervisor.agent import supervisor_agent
+from fastapi import UploadFile, File, Header, Request, Response
+from fastapi.encoders import jsonable_encoder
+from agents.registry import get_agent, warm_up
+from agents.pitch_deck.indexing import wait_for_indexing
 from langgraph.pregel import Pregel
-from langchain_core.messages import AIMessage
+from langchain_core.messages import AIMessage, AIMessageChunk
 from core.utils import (
     handle_input_slides, 
     handle_market_size,
     handle_complete,
-    getbase64, 
-    convert_pdf_to_images, 
+    open_slide_feed,
+    make_deck_id,
     handle_qa_input, 
     handle_github_link
 )
+from core.settings import settings
 from core.schema import (
     ChatMessage,
+    RenderOptions,
+    StreamInput,
     UserInput,
 )
 from core.utils import (
+    convert_message_content_to_string,
     langchain_to_chat_message,
 )
+from core.pdf import shutdown_render_pool
+from core.checkpoint import sqlite_checkpointer
+from core.clients import aclose_clients
+from core.ratelimit import current_request
+from core.cache import deck_cache, deck_cache_key
 
 # Suppress LangChain beta warnings
 warnings.filterwarnings("ignore", category=LangChainBetaWarning)
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    async with sqlite_checkpointer():
+        if settings.WARM_UP_ON_STARTUP:
+            warm_up()
+        yield
+        await wait_for_indexing()
+    shutdown_render_pool()
+    await aclose_clients()
+
 # Initialize FastAPI application
 app = FastAPI(
     title="Pitch Deck Analysis API",
     description="API endpoints for pitch deck analysis, market research, and GitHub repository analysis",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Configure CORS middleware
@@ -56,21 +79,144 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def scope_provider_calls(request: Request, call_next):
+    """Tag provider calls with their API request so rate-limit slots are shared fairly."""
+    current_request.set(uuid4())
+    return await call_next(request)
+
 router = APIRouter()
 
+def use_deck_cache(cache_control: str | None) -> bool:
+    """Serve cached deck results unless disabled or the client sent `Cache-Control: no-cache`."""
+    return settings.DECK_CACHE_ENABLED and "no-cache" not in (cache_control or "").lower()
+
+def is_complete(result: Dict[str, Any]) -> bool:
+    """
+    Whether an analysis has every summary section and a scorecard. A section
+    whose model call failed comes back as None; such partial results are
+    returned but not cached, so a transient failure is not served for days.
+    """
+    summary = result.get('summary') or {}
+    return (
+        not result.get('error')
+        and bool(summary)
+        and all(section is not None for section in summary.values())
+        and bool(result.get('scorecard'))
+    )
+
+def complete_output(deck_id: str, result: Dict[str, Any]) -> Dict[str, Any]:
+    """Response body of /analyze-complete from the supervisor's final state."""
+    out = {
+        'deck_id': deck_id,
+        'summary': result['summary'],
+        'scorecard': result['scorecard'],
+        'market_research': {
+            'sector': result['sector'],
+            'market_size': result['market_size'],
+            'competitors': result['competitors'],
+        }
+    }
+    if result['github_url']:
+        out['github_details'] = result['github_details']
+    return jsonable_encoder(out)
+
+def pitch_deck_output(deck_id: str, result: Dict[str, Any]) -> Dict[str, Any]:
+    """Response body of /analyze-pitch-deck from the pitch deck graph's final state."""
+    if ('scorecard' not in result) or ('summary' not in result):
+        raise ValueError(result.get('error', 'Pitch deck analysis did not complete'))
+    return jsonable_encoder({
+        'deck_id': deck_id,
+        'scorecard': result['scorecard'],
+        'summary': result['summary'],
+    })
+
+def sse_event(type: str, content: Any) -> str:
+    return f"data: {json.dumps({'type': type, 'content': jsonable_encoder(content)})}\n\n"
+
+def _sse_response_example() -> dict[int | str, Any]:
+    return {
+        status.HTTP_200_OK: {
+            "description": "Server Sent Event Response",
+            "content": {
+                "text/event-stream": {
+                    "example": "data: {'type': 'token', 'content': 'Hello'}\n\ndata: {'type': 'token', 'content': ' World'}\n\ndata: [DONE]\n\n",
+                    "schema": {"type": "string"},
+                }
+            },
+        }
+    }
+
+async def deck_event_generator(
+    agent_name: str,
+    pdf_bytes: bytes,
+    analysis: str,
+    build_input: Callable,
+    build_output: Callable[[str, Dict[str, Any]], Dict[str, Any]],
+    use_cache: bool,
+) -> AsyncGenerator[str, None]:
+    """
+    Run a deck analysis graph and yield its progress as server-sent events:
+    `progress` events as slides are rendered and OCR'd, summary sections land,
+    categories are scored and graph stages finish, then the `result` (the
+    same body the blocking endpoint returns) or an `error`.
+    """
+    try:
+        render_options = RenderOptions()
+        cache_key = deck_cache_key(pdf_bytes, analysis, render_options)
+        if use_cache and (cached := await deck_cache.aget(cache_key)) is not None:
+            yield sse_event("result", cached)
+            yield "data: [DONE]\n\n"
+            return
+
+        deck_id = make_deck_id(pdf_bytes)
+        result: Dict[str, Any] = {}
+        async with open_slide_feed(pdf_bytes, render_options) as feed:
+            yield sse_event("progress", {"stage": "render", "total": feed.total})
+
+            kwargs, run_id = await build_input([], deck_id, feed.id)
+            async for stream_mode, event in get_agent(agent_name).astream(
+                **kwargs, stream_mode=["custom", "updates", "values"]
+            ):
+                if stream_mode == "custom":
+                    yield sse_event("progress", event)
+                elif stream_mode == "updates":
+                    for node in event:
+                        yield sse_event("progress", {"stage": "done", "node": node})
+                else:
+                    result = event
+
+        out = build_output(deck_id, result)
+        if settings.DECK_CACHE_ENABLED and is_complete(result):
+            await deck_cache.aset(cache_key, out)
+        yield sse_event("result", out)
+    except Exception as e:
+        logger.error(f"Deck analysis stream error: {e}")
+        yield sse_event("error", "Usage limit reached. Please try again in 30 seconds.")
+    yield "data: [DONE]\n\n"
+
 @router.post("/analyze-complete")
-async def analyze_complete(file: UploadFile = File(...)) -> Dict[str, Any]:
+async def analyze_complete(
+    response: Response,
+    file: UploadFile = File(...),
+    cache_control: str | None = Header(default=None),
+) -> Dict[str, Any]:
     """
     Performs a complete analysis using the supervisor agent, including:
     - Pitch deck analysis
     - Market research
     - GitHub repository analysis (if applicable)
     
+    Results are cached by the SHA-256 of the PDF together with the prompt and
+    model versions; send `Cache-Control: no-cache` to force a fresh analysis.
+    
     Args:
         file (UploadFile): PDF file containing the pitch deck
+        cache_control (str): Optional Cache-Control header
         
     Returns:
         SupervisorAnalysisResponse containing:
+            - deck_id: Id of the deck's chunks in the QA assistant's index
             - pitch_deck_summary: Detailed analysis of the pitch deck
             - pitch_deck_scorecard: Evaluation metrics for the pitch deck
             - market_analysis: Market research data
@@ -83,28 +229,23 @@ async def analyze_complete(file: UploadFile = File(...)) -> Dict[str, Any]:
     """
 
     try:
-        agent: CompiledStateGraph = supervisor_agent
-        encoded_images = []
+        agent: CompiledStateGraph = get_agent("supervisor")
         pdf_bytes = await file.read()
-        images = convert_pdf_to_images(pdf_bytes)
+        render_options = RenderOptions()
+        cache_key = deck_cache_key(pdf_bytes, "analyze-complete", render_options)
+        if use_deck_cache(cache_control) and (cached := await deck_cache.aget(cache_key)) is not None:
+            response.headers["X-Deck-Cache"] = "HIT"
+            return cached
 
-        for idx, image in enumerate(images):
-            encoded_images.append({'imageByte': getbase64(image)})
-
-        kwargs, run_id = await handle_complete(encoded_images)
-        result = supervisor_agent.invoke(**kwargs)
+        deck_id = make_deck_id(pdf_bytes)
+        async with open_slide_feed(pdf_bytes, render_options) as feed:
+            kwargs, run_id = await handle_complete([], deck_id, feed.id)
+            result = await agent.ainvoke(**kwargs)
         
-        out = {
-            'summary': result['summary'],
-            'scorecard': result['scorecard'],
-            'market_research': {
-                'sector': result['sector'],
-                'market_size': result['market_size'],
-                'competitors': result['competitors'],
-            }
-        }
-        if result['github_url']:
-            out['github_details'] = result['github_details']
+        out = complete_output(deck_id, result)
+        if settings.DECK_CACHE_ENABLED and is_complete(result):
+            await deck_cache.aset(cache_key, out)
+        response.headers["X-Deck-Cache"] = "MISS"
         return out
     
     except Exception as e:
@@ -115,44 +256,124 @@ async def analyze_complete(file: UploadFile = File(...)) -> Dict[str, Any]:
 
 
 @router.post("/analyze-pitch-deck")
-async def analyze_pitch_deck(file: UploadFile = File(...)) -> Dict[str, Any]:
+async def analyze_pitch_deck(
+    response: Response,
+    file: UploadFile = File(...),
+    cache_control: str | None = Header(default=None),
+) -> Dict[str, Any]:
     """
     Analyzes a pitch deck PDF and returns a scorecard and summary.
     
+    Results are cached by the SHA-256 of the PDF together with the prompt and
+    model versions; send `Cache-Control: no-cache` to force a fresh analysis.
+    
     Args:
         file (UploadFile): PDF file containing the pitch deck
+        cache_control (str): Optional Cache-Control header
         
     Returns:
         Dict containing:
+            - deck_id: Id of the deck's chunks in the QA assistant's index
             - scorecard: Evaluation metrics for the pitch deck
             - summary: Detailed analysis of the pitch deck
             
     Raises:
         HTTPException: If API usage limit is reached or processing fails
     """
-    agent: CompiledStateGraph = pitch_deck_agent
-    encoded_images = []
+    agent: CompiledStateGraph = get_agent("pitch_deck")
     pdf_bytes = await file.read()
-    images = convert_pdf_to_images(pdf_bytes)
+    render_options = RenderOptions()
+    cache_key = deck_cache_key(pdf_bytes, "analyze-pitch-deck", render_options)
+    if use_deck_cache(cache_control) and (cached := await deck_cache.aget(cache_key)) is not None:
+        response.headers["X-Deck-Cache"] = "HIT"
+        return cached
 
-    for idx, image in enumerate(images):
-        encoded_images.append({'imageByte': getbase64(image)})
-
-    kwargs, run_id = await handle_input_slides(encoded_images)
-    response_events = await agent.ainvoke(**kwargs, stream_mode=["updates", "values"])
-    response_type, response = response_events[-1]
+    deck_id = make_deck_id(pdf_bytes)
+    async with open_slide_feed(pdf_bytes, render_options) as feed:
+        kwargs, run_id = await handle_input_slides([], deck_id, feed.id)
+        response_events = await agent.ainvoke(**kwargs, stream_mode=["updates", "values"])
+    response_type, result = response_events[-1]
     
-    if (response_type == "values") and ('scorecard' in response) and ('summary' in response):
-        return {
-            'scorecard': response['scorecard'],
-            'summary': response['summary'],
-        }
+    if (response_type == "values") and ('scorecard' in result) and ('summary' in result):
+        out = pitch_deck_output(deck_id, result)
+        if settings.DECK_CACHE_ENABLED and is_complete(result):
+            await deck_cache.aset(cache_key, out)
+        response.headers["X-Deck-Cache"] = "MISS"
+        return out
     else:
         raise HTTPException(
             status_code=500,
             detail="Usage limit reached. Please try again in 30 seconds.",
         )
 
+@router.post(
+    "/analyze-complete/stream",
+    response_class=StreamingResponse,
+    responses=_sse_response_example(),
+)
+async def analyze_complete_stream(
+    file: UploadFile = File(...),
+    cache_control: str | None = Header(default=None),
+) -> StreamingResponse:
+    """
+    Streams a complete analysis as server-sent events.
+    
+    Emits `progress` events while the analysis runs: `render` with the slide
+    count, `ocr` per slide, `summary` per section, `score` per rubric category
+    and `done` as each supervisor stage (pitch deck, market research, GitHub)
+    finishes. Ends with a `result` event holding the /analyze-complete body,
+    or an `error` event, followed by `[DONE]`.
+    
+    Args:
+        file (UploadFile): PDF file containing the pitch deck
+        cache_control (str): Optional Cache-Control header
+    """
+    pdf_bytes = await file.read()
+    return StreamingResponse(
+        deck_event_generator(
+            "supervisor",
+            pdf_bytes,
+            "analyze-complete",
+            handle_complete,
+            complete_output,
+            use_deck_cache(cache_control),
+        ),
+        media_type="text/event-stream",
+    )
+
+@router.post(
+    "/analyze-pitch-deck/stream",
+    response_class=StreamingResponse,
+    responses=_sse_response_example(),
+)
+async def analyze_pitch_deck_stream(
+    file: UploadFile = File(...),
+    cache_control: str | None = Header(default=None),
+) -> StreamingResponse:
+    """
+    Streams a pitch deck analysis as server-sent events.
+    
+    Emits the same `progress` events as /analyze-complete/stream, then a
+    `result` event holding the /analyze-pitch-deck body, or an `error` event,
+    followed by `[DONE]`.
+    
+    Args:
+        file (UploadFile): PDF file containing the pitch deck
+        cache_control (str): Optional Cache-Control header
+    """
+    pdf_bytes = await file.read()
+    return StreamingResponse(
+        deck_event_generator(
+            "pitch_deck",
+            pdf_bytes,
+            "analyze-pitch-deck",
+            handle_input_slides,
+            pitch_deck_output,
+            use_deck_cache(cache_control),
+        ),
+        media_type="text/event-stream",
+    )
+
 @router.post("/analyze-market-size")
 async def analyze_market_size(company_overview: dict) -> Dict[str, Any]:
     """
@@ -172,7 +393,7 @@ async def analyze_market_size(company_overview: dict) -> Dict[str, Any]:
     """
     try:
         kwargs, run_id = await handle_market_size(company_overview)
-        market_analysis = market_research_agent.invoke(**kwargs)
+        market_analysis = await get_agent("market_size").ainvoke(**kwargs)
         return {
             'market_research': {
                 'sector': market_analysis['sector'].name,
@@ -202,7 +423,7 @@ async def analyze_github_repository(repository_url: str) -> Dict[str, Any]:
     """
     try:
         kwargs, run_id = await handle_github_link(repository_url)
-        repository_analysis = github_repo_agent.invoke(**kwargs)
+        repository_analysis = await get_agent("github_repo").ainvoke(**kwargs)
         return {
             'github_analysis': repository_analysis['repo'],
         }
@@ -229,7 +450,7 @@ async def process_chat_query(user_input: UserInput) -> ChatMessage:
     Raises:
         HTTPException: If processing fails or encounters an error
     """
-    agent: Pregel = qa_agent
+    agent: Pregel = get_agent("chatbot_qa")
     kwargs, run_id = await handle_qa_input(user_input, agent)
     
     try:
@@ -261,5 +482,66 @@ async def process_chat_query(user_input: UserInput) -> ChatMessage:
             detail="An unexpected error occurred while processing your request"
         )
 
+async def message_generator(
+    agent: Pregel,
+    kwargs: Dict[str, Any],
+    run_id: UUID,
+    stream_tokens: bool,
+) -> AsyncGenerator[str, None]:
+    """
+    Run the QA agent and yield its output as server-sent events: a `token`
+    event per LLM token of the answer (with `stream_tokens`), a `message`
+    event per completed message, or an `error`, then `[DONE]`.
+    """
+
+    try:
+        async for stream_mode, event in agent.astream(**kwargs, stream_mode=["updates", "messages"]):
+            if stream_mode == "updates":
+                for node, updates in event.items():
+                    if node == "__interrupt__":
+                        messages = [AIMessage(content=interrupt.value) for interrupt in updates]
+                    else:
+                        messages = (updates or {}).get("messages", [])
+                    for message in messages:
+                        chat_message = langchain_to_chat_message(message)
+                        chat_message.run_id = str(run_id)
+                        yield sse_event("message", chat_message.model_dump())
+            elif stream_tokens:
+                message, metadata = event
+                # Tool-call chunks of query_or_respond carry no content and are skipped
+                if isinstance(message, AIMessageChunk) and message.content:
+                    yield sse_event("token", convert_message_content_to_string(message.content))
+    except Exception as e:
+        logger.error(f"Chat streaming error: {e}")
+        yield sse_event("error", "An unexpected error occurred while processing your request")
+    yield "data: [DONE]\n\n"
+
+@router.post(
+    "/chat-assistant/stream",
+    response_class=StreamingResponse,
+    responses=_sse_response_example(),
+)
+async def stream_chat_query(user_input: StreamInput) -> StreamingResponse:
+    """
+    Streams the assistant's response to a user query as server-sent events.
+    
+    Takes the same input as /chat-assistant, plus `stream_tokens` to choose
+    whether answer tokens are streamed as they are generated or only the
+    completed messages are sent.
+    
+    Args:
+        user_input (StreamInput): User's message and optional thread/context information
+        
+    Raises:
+        HTTPException: If agent_config uses reserved keys; raised before the stream starts
+    """
+    agent: Pregel = get_agent("chatbot_qa")
+    # Validate the input and load the thread's state before the 200 response is sent
+    kwargs, run_id = await handle_qa_input(user_input, agent)
+    return StreamingResponse(
+        message_generator(agent, kwargs, run_id, user_input.stream_tokens),
+        media_type="text/event-stream",
+    )
+
 # Include router in the FastAPI application
 app.include_router(router)
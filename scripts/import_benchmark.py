@@ -0,0 +1,84 @@
+"""
+Measure how long `import main` takes in a fresh interpreter and fail if it
+exceeds a budget, so slow imports don't creep back into application startup.
+
+    python scripts/import_benchmark.py --budget 3.0
+
+Also prints the modules imported by it with the largest cumulative import
+time (from `python -X importtime`) to show where startup time goes.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def time_import(module: str) -> tuple[float, str]:
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    elapsed = time.perf_counter() - started
+    if result.returncode != 0:
+        sys.exit(f"import {module} failed:\n{result.stderr[-2000:]}")
+    return elapsed, result.stderr
+
+
+def slowest_imports(importtime_log: str, module: str, top: int) -> list[tuple[int, str]]:
+    """(cumulative microseconds, name) of the slowest modules imported directly by `module`."""
+    rows = []
+    for line in importtime_log.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Names are indented by two spaces per level of nesting
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((depth, int(cumulative), name.strip()))
+
+    # A module is logged after everything it imports, so its children are the
+    # rows one level deeper that precede it, back to its previous sibling
+    children = []
+    for position in range(len(rows) - 1, -1, -1):
+        depth, _, name = rows[position]
+        if name != module:
+            continue
+        for child_depth, cumulative, child in reversed(rows[:position]):
+            if child_depth <= depth:
+                break
+            if child_depth == depth + 1:
+                children.append((cumulative, child))
+        break
+    return sorted(children, reverse=True)[:top]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--budget", type=float, default=3.0, help="Seconds allowed for the import")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    timings = []
+    log = ""
+    for _ in range(args.runs):
+        elapsed, log = time_import(args.module)
+        timings.append(elapsed)
+
+    for cumulative, name in slowest_imports(log, args.module, args.top):
+        print(f"{cumulative / 1e6:8.3f}s  {name}")
+    median = statistics.median(timings)
+    print(f"\nimport {args.module}: median {median:.3f}s over {args.runs} runs (budget {args.budget:.3f}s)")
+    if median > args.budget:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
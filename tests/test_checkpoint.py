@@ -0,0 +1,33 @@
+import asyncio
+
+import pytest
+
+from agents.chatbot_qa.agent import graph_builder
+from core.checkpoint import attach_checkpointer, build_checkpointer, sqlite_checkpointer
+from core.schema import UserInput
+from core.settings import settings
+from core.utils import handle_qa_input
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite", "none"])
+def test_qa_input_is_built_under_every_checkpointer(backend, monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "CHECKPOINTER", backend)
+    monkeypatch.setattr(settings, "CHECKPOINT_DB_PATH", str(tmp_path / "checkpoints.sqlite3"))
+
+    async def build():
+        async with sqlite_checkpointer():
+            agent = graph_builder.compile(checkpointer=build_checkpointer())
+            attach_checkpointer(agent)
+            assert agent.checkpointer
+            user_input = UserInput(message="Who founded it?", thread_id="thread", deck_id="deck")
+            return await handle_qa_input(user_input, agent)
+
+    kwargs, _ = asyncio.run(build())
+    assert kwargs["config"]["configurable"]["thread_id"] == "thread"
+    assert kwargs["input"]["deck_id"] == "deck"
+
+
+def test_one_shot_graphs_skip_checkpointing_when_disabled(monkeypatch):
+    monkeypatch.setattr(settings, "CHECKPOINTER", "none")
+    monkeypatch.setattr(settings, "CHECKPOINT_ONE_SHOT_GRAPHS", True)
+    assert build_checkpointer(one_shot=True) is False
@@ -0,0 +1,42 @@
+import asyncio
+
+from langchain_core.embeddings import Embeddings
+
+from core.cache import SQLiteCache
+from core.embeddings import CachedEmbeddings
+
+
+class CountingEmbeddings(Embeddings):
+    def __init__(self):
+        self.calls = []
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(text)), 1.0] for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def test_embeds_only_distinct_misses_in_batches(tmp_path):
+    provider = CountingEmbeddings()
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite3"), "embeddings")
+    embeddings = CachedEmbeddings(provider, "model", cache=cache, batch_size=2)
+
+    vectors = asyncio.run(embeddings.aembed_documents(["a", "bb", "a", "ccc"]))
+    assert vectors == [[1.0, 1.0], [2.0, 1.0], [1.0, 1.0], [3.0, 1.0]]
+    assert provider.calls == [["a", "bb"], ["ccc"]]
+
+    assert asyncio.run(embeddings.aembed_query("bb")) == [2.0, 1.0]
+    assert len(provider.calls) == 2
+
+
+def test_reads_vectors_back_from_the_persistent_cache(tmp_path):
+    provider = CountingEmbeddings()
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite3"), "embeddings")
+    CachedEmbeddings(provider, "model", cache=cache).embed_documents(["a", "bb"])
+
+    fresh = CachedEmbeddings(provider, "model", cache=cache)
+    assert fresh.embed_documents(["bb", "a", "ddd"]) == [[2.0, 1.0], [1.0, 1.0], [3.0, 1.0]]
+    assert provider.calls == [["a", "bb"], ["ddd"]]
+    assert cache.stats() == {"hits": 2, "misses": 3}
@@ -0,0 +1,52 @@
+import hashlib
+import os
+
+import pytest
+
+from agents.pitch_deck.helpers import find_duplicate_slides
+from core.pdf import convert_pdf_to_images
+
+EXAMPLES = os.path.join(os.path.dirname(__file__), "..", "examples")
+
+
+def _slides(pdf_name: str) -> list:
+    with open(os.path.join(EXAMPLES, pdf_name), "rb") as f:
+        pages = convert_pdf_to_images(f.read())
+        return [
+            {
+                "imageRef": hashlib.sha256(page["image"]).hexdigest(),
+                "textLayer": page["text"],
+                "fingerprint": page["fingerprint"],
+            }
+            for page in pages
+        ]
+
+
+@pytest.mark.parametrize(
+    "pdf_name",
+    ["MapMe-Pitch-Deck.pdf", "TrialSync-Pitch-Deck.pdf", "Uber-Pitch-Deck.pdf"],
+)
+def test_distinct_example_slides_are_kept_apart(pdf_name):
+    # MapMe and Uber are image-only: every text layer is empty and several
+    # distinct slides have fingerprints within the default hash distance
+    slides = _slides(pdf_name)
+    assert find_duplicate_slides(slides) == list(range(len(slides)))
+
+
+def test_identical_renders_share_ocr_without_text():
+    slides = [
+        {"imageRef": "a", "textLayer": [], "fingerprint": "0" * 16},
+        {"imageRef": "b", "textLayer": [], "fingerprint": "0" * 16},
+        {"imageRef": "a", "textLayer": [], "fingerprint": "0" * 16},
+    ]
+    assert find_duplicate_slides(slides) == [0, 1, 0]
+
+
+def test_build_steps_collapse_onto_final_step():
+    slides = [
+        {"imageRef": "a", "textLayer": ["Problem"], "fingerprint": "0" * 16},
+        {"imageRef": "b", "textLayer": ["Problem", "Cost"], "fingerprint": "0" * 15 + "1"},
+        {"imageRef": "c", "textLayer": ["Problem", "Cost", "Time"], "fingerprint": "0" * 15 + "3"},
+        {"imageRef": "d", "textLayer": ["Solution"], "fingerprint": "f" * 16},
+    ]
+    assert find_duplicate_slides(slides) == [2, 2, 2, 3]
@@ -0,0 +1,61 @@
+import json
+import sqlite3
+
+from core.cache import SQLiteCache
+
+
+def _totals(cache: SQLiteCache) -> tuple:
+    return cache._connection().execute(
+        f"SELECT entries, bytes FROM {cache.namespace}_totals"
+    ).fetchone()
+
+
+def test_evicts_least_recently_used_over_byte_cap(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite3"), "entries_cache", max_bytes=3 * len(json.dumps("x" * 10)))
+    for key in "abc":
+        cache.set(key, "x" * 10)
+    cache.get("a")
+    cache.set("d", "x" * 10)
+    assert cache.get("b") is None
+    assert all(cache.get(key) is not None for key in "acd")
+    assert _totals(cache) == (3, 3 * len(json.dumps("x" * 10)))
+
+
+def test_evicts_over_entry_cap_and_tracks_overwrites(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite3"), "entries_cache", max_entries=2)
+    cache.set("a", 1)
+    cache.set("a", "longer value")
+    cache.set("b", 2)
+    cache.set("c", 3)
+    assert cache.get("a") is None
+    assert _totals(cache) == (2, 2)
+    cache.delete("b")
+    assert _totals(cache) == (1, 1)
+
+
+def test_migrates_table_without_size_column(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE legacy_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+        "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+    )
+    conn.execute("INSERT INTO legacy_cache VALUES ('a', '\"é\"', 0, 0)")
+    conn.commit()
+    conn.close()
+
+    cache = SQLiteCache(path, "legacy_cache")
+    assert _totals(cache) == (1, len('"é"'.encode("utf-8")))
+    assert cache.get("a") == "é"
+
+
+def test_deck_cache_key_changes_with_the_vector_index(monkeypatch):
+    from core.cache import deck_cache_key
+    from core.schema import RenderOptions
+    from core.settings import settings
+
+    key = deck_cache_key(b"%PDF", "analyze-pitch-deck", RenderOptions())
+    monkeypatch.setattr(settings, "VECTOR_BACKEND", "local")
+    local_key = deck_cache_key(b"%PDF", "analyze-pitch-deck", RenderOptions())
+    monkeypatch.setattr(settings, "VECTOR_INDEX_NAME", "other-index")
+    assert len({key, local_key, deck_cache_key(b"%PDF", "analyze-pitch-deck", RenderOptions())}) == 3
@@ -0,0 +1,19 @@
+from agents.pitch_deck.context import _relevance
+
+
+def _slide(text: str) -> dict:
+    return {"index": 0, "text": [text]}
+
+
+def test_keywords_do_not_match_inside_longer_words():
+    slide = _slide("Some of the same users arrange a cool moment")
+    assert _relevance("Market Sizing & Growth", slide) == 0
+    assert _relevance("Founder-Market Fit", slide) == 0
+    # "users" is the only Traction keyword on the slide
+    assert _relevance("Traction", slide) == 1
+
+
+def test_keywords_match_whole_words_and_plurals():
+    assert _relevance("Market Sizing & Growth", _slide("Our SOM is $2bn")) == 2
+    assert _relevance("Traction", _slide("ARR grew 20% MoM")) == 2
+    assert _relevance("Company Overview", _slide("Headquarters in Berlin")) == 1
@@ -0,0 +1,105 @@
+import asyncio
+import os
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from core.settings import settings
+from core.vectorstore import LocalVectorStore
+
+VOCABULARY = ("revenue", "team", "market", "founder")
+
+
+class KeywordEmbeddings(Embeddings):
+    """One dimension per vocabulary word, set when the text mentions it."""
+
+    def __init__(self, dimensions: int = len(VOCABULARY)):
+        self.dimensions = dimensions
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text):
+        vector = [float(word in text.lower()) for word in VOCABULARY[:self.dimensions]]
+        return vector + [0.01] * (self.dimensions - len(vector))
+
+
+def _store(path, **kwargs) -> LocalVectorStore:
+    store = LocalVectorStore(str(path), KeywordEmbeddings(**kwargs))
+    store.add_texts(
+        ["Revenue grew 3x", "Our team of founders", "Market of $2bn", "Founder led sales"],
+        metadatas=[{"deck_id": "a"}, {"deck_id": "a"}, {"deck_id": "b"}, {"deck_id": "b"}],
+        ids=["a:1", "a:2", "b:1", "b:2"],
+    )
+    return store
+
+
+def test_similarity_search_ranks_and_filters(tmp_path):
+    store = _store(tmp_path)
+    assert store.similarity_search("revenue", k=1)[0].id == "a:1"
+    assert [doc.id for doc in store.similarity_search("founder", k=4, filter={"deck_id": "b"})][0] == "b:2"
+    assert {doc.metadata["deck_id"] for doc in store.similarity_search("team", k=4, filter={"deck_id": "b"})} == {"b"}
+    document, score = store.similarity_search_with_score("revenue", k=1)[0]
+    assert score == pytest.approx(1.0)
+
+
+def test_upsert_by_id_replaces_documents(tmp_path):
+    store = _store(tmp_path)
+    store.add_texts(["Market of $5bn"], metadatas=[{"deck_id": "b"}], ids=["b:1"])
+    assert len(store._documents) == 4
+    assert store.similarity_search("market", k=1)[0].page_content == "Market of $5bn"
+
+
+def test_rejects_embeddings_of_another_dimension(tmp_path):
+    _store(tmp_path)
+    with pytest.raises(ValueError, match="different embedding model"):
+        _store(tmp_path, dimensions=3)
+
+
+def test_keyword_search_scores_with_bm25(tmp_path):
+    store = _store(tmp_path)
+    assert [doc.id for doc in store.keyword_search("revenue grew")] == ["a:1"]
+    assert store.keyword_search("founder", filter={"deck_id": "a"}) == []
+    assert store.keyword_search("unrelated") == []
+
+
+def test_mmr_returns_distinct_documents(tmp_path):
+    store = _store(tmp_path)
+    results = store.max_marginal_relevance_search("founder team", k=2, fetch_k=4)
+    assert len({doc.id for doc in results}) == 2
+
+
+def test_other_instances_reload_after_a_write(tmp_path):
+    writer = _store(tmp_path)
+    reader = LocalVectorStore(str(tmp_path), KeywordEmbeddings())
+    assert len(reader.similarity_search("team", k=10)) == 4
+
+    asyncio.run(writer.aadd_documents([Document("Team of five", metadata={"deck_id": "c"})], ids=["c:1"]))
+    results = reader.similarity_search("team", k=10, filter={"deck_id": "c"})
+    assert [doc.page_content for doc in results] == ["Team of five"]
+    # Only the vectors of the last two writes are kept on disk
+    assert len([name for name in os.listdir(tmp_path) if name.startswith("vectors-")]) == 2
+
+
+def test_search_deck_uses_the_local_backend(tmp_path, monkeypatch):
+    from agents.chatbot_qa import nodes
+    from agents.pitch_deck.indexing import index_deck
+
+    monkeypatch.setattr(settings, "VECTOR_BACKEND", "local")
+    monkeypatch.setattr(settings, "LOCAL_VECTOR_PATH", str(tmp_path))
+    monkeypatch.setattr("core.clients.get_embeddings", lambda: KeywordEmbeddings())
+    nodes.get_vector_store.cache_clear()
+    try:
+        slides = [
+            {"index": 0, "text": ["Revenue grew 3x"], "image": [], "figure": [], "duplicate_of": None},
+            {"index": 1, "text": ["Founder led sales"], "image": [], "figure": [], "duplicate_of": None},
+        ]
+        asyncio.run(index_deck("deck", slides, {}))
+        asyncio.run(index_deck("other", slides[:1], {}))
+
+        for search_type in ("similarity", "hybrid", "mmr", "threshold"):
+            results = asyncio.run(nodes.search_deck("revenue", "deck", k=1, search_type=search_type))
+            assert [(doc.metadata["deck_id"], doc.metadata["slide"]) for doc in results] == [("deck", 1)]
+    finally:
+        nodes.get_vector_store.cache_clear()